@@ -1,9 +1,20 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
 
 from .models import Category, Location, Post, Comment
+from .slow_queries import read_log, worst_offenders
 
 
 admin.site.register(Category)
 admin.site.register(Location)
 admin.site.register(Post)
 admin.site.register(Comment)
+
+
+def slow_queries_view(request):
+    """Запросы из лога медленных запросов, самые затратные сверху."""
+    return TemplateResponse(request, 'admin/slow_queries.html', {
+        **admin.site.each_context(request),
+        'title': 'Медленные запросы',
+        'offenders': worst_offenders(read_log()),
+    })
@@ -0,0 +1,289 @@
+import gc
+import json
+import logging
+from collections import namedtuple
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.test import Client, override_settings
+from django.urls import get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import Post
+from .profiling import percentile, profile, profile_templates
+
+
+# Маршруты из blog/urls.py, pages/urls.py и маршруты авторизации
+# (у последних нет пространства имён).
+NAMESPACES = ('blog', 'pages', None)
+METRICS = ('p50', 'p95', 'queries', 'sql', 'template', 'size')
+# Разница во времени меньше этого порога (мс) — шум, а не регрессия.
+NOISE_MS = 2.0
+# Кеш на время замеров: очистка перед запросом не должна задевать
+# общий кеш сайта.
+BENCHMARK_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'blog-benchmarks',
+}}
+# Debug toolbar встраивается в ответы для INTERNAL_IPS,
+# поэтому запросы идут с адреса не из этого списка.
+REMOTE_ADDR = '192.0.2.1'
+
+Route = namedtuple('Route', 'name kwargs')
+
+
+def _walk(patterns, namespace=None):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from _walk(
+                pattern.url_patterns, pattern.namespace or namespace
+            )
+        elif pattern.name:
+            yield namespace, pattern
+
+
+def routes():
+    """Имена маршрутов и имена их параметров, без повторов."""
+    found = {}
+    for namespace, pattern in _walk(get_resolver().url_patterns):
+        if namespace not in NAMESPACES:
+            continue
+        name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+        found.setdefault(name, Route(
+            name, tuple(getattr(pattern.pattern, 'converters', ()))
+        ))
+    return list(found.values())
+
+
+def sample_kwargs():
+    """
+    Параметры маршрутов из базы: самый обсуждаемый видимый пост,
+    его автор, категория и первый комментарий.
+    """
+    post = Post.objects.select_related('author', 'category').filter(
+        is_visible=True
+    ).order_by('-comment_count', 'id').first()
+    if post is None:
+        return None, {}
+    user = post.author
+    kwargs = {
+        'post_id': post.id,
+        'category_slug': post.category.slug,
+        'username': user.username,
+        'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': '',
+    }
+    comment = post.comments.order_by('id').first()
+    if comment is not None:
+        kwargs['comment_id'] = comment.id
+    return user, kwargs
+
+
+def login(client, user):
+    """
+    Войти, если клиент ещё не вошёл или вышел из аккаунта:
+    среди маршрутов есть выход, он удаляет сессию.
+    """
+    if client.session.get(SESSION_KEY) is None:
+        client.force_login(user)
+        client.created_sessions.add(client.session.session_key)
+
+
+def measure(client, path, requests, warm=False, user=None):
+    """
+    Метрики GET-запросов к path: время в мс, размер в байтах.
+    С user запросы идут от имени вошедшего пользователя.
+    """
+    timings, results = [], []
+    for _ in range(requests):
+        if user is not None:
+            login(client, user)
+        if not warm:
+            cache.clear()
+        # Сборка мусора посреди запроса даёт случайные выбросы,
+        # поэтому на время замера она выключена, как в timeit.
+        gc.disable()
+        try:
+            with profile() as result:
+                response = client.get(path)
+        finally:
+            gc.enable()
+        timings.append(result.total_time * 1000)
+        results.append(result)
+    return {
+        'status': response.status_code,
+        'p50': percentile(timings, 0.5),
+        'p95': percentile(timings, 0.95),
+        'queries': max(result.query_count for result in results),
+        'sql': percentile([r.sql_time * 1000 for r in results], 0.5),
+        'template': percentile(
+            [r.template_time * 1000 for r in results], 0.5
+        ),
+        'size': len(response.content),
+    }
+
+
+def make_client():
+    client = Client(
+        raise_request_exception=False,
+        HTTP_HOST=settings.ALLOWED_HOSTS[0],
+        REMOTE_ADDR=REMOTE_ADDR,
+    )
+    client.created_sessions = set()
+    return client
+
+
+@contextmanager
+def isolated(client):
+    """
+    Замеры не трогают данные сайта: кеш на время замеров — свой,
+    в памяти процесса, а сессии, созданные входом клиента,
+    удаляются после замеров.
+    """
+    try:
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            yield
+    finally:
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        for session_key in client.created_sessions:
+            store(session_key).delete()
+        client.created_sessions.clear()
+
+
+def sample_user():
+    user, kwargs = sample_kwargs()
+    if user is None:
+        raise ValueError(
+            'В базе нет видимых постов: наполните её командой seed.'
+        )
+    return user, kwargs
+
+
+@contextmanager
+def quiet_loggers():
+    """
+    Ответы 403 и 500 и стоимость запросов видны в результатах,
+    в логе они не нужны.
+    """
+    loggers = [
+        logging.getLogger(name)
+        for name in ('django.request', 'blog.performance')
+    ]
+    levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        for logger, level in zip(loggers, levels):
+            logger.setLevel(level)
+
+
+def route_path(route, user, kwargs):
+    # Токен сброса пароля устаревает после каждого входа.
+    kwargs['token'] = default_token_generator.make_token(user)
+    return reverse(route.name, kwargs={
+        name: kwargs[name] for name in route.kwargs
+    })
+
+
+def run(requests=20, warm=False, log=None):
+    """
+    Замерить все маршруты гостем и автором поста.
+    Возвращает словарь «маршрут [кто]» -> метрики.
+    """
+    user, kwargs = sample_user()
+    client = make_client()
+    results = {}
+    with quiet_loggers(), isolated(client):
+        for route in routes():
+            if not set(route.kwargs) <= set(kwargs):
+                continue
+            path = route_path(route, user, kwargs)
+            for who, login in (('anon', None), ('user', user)):
+                client.logout()
+                results[f'{route.name} [{who}]'] = measure(
+                    client, path, requests, warm, login
+                )
+                if log:
+                    log(f'{route.name} [{who}]')
+    return results
+
+
+def profile_page(target, requests=20, as_author=False):
+    """
+    Время рендеринга страницы по шаблонам, include, тегам и фильтрам,
+    в среднем на запрос. target — путь или имя маршрута, параметры
+    маршрута берутся из базы. Кеш замеров очищается перед каждым
+    запросом.
+    Возвращает путь, код ответа, время всех шаблонов и строки
+    (метка, вызовов, секунд).
+    """
+    user, kwargs = sample_user()
+    if target.startswith('/'):
+        path = target
+    else:
+        route = {route.name: route for route in routes()}.get(target)
+        if route is None:
+            raise ValueError(f'Нет маршрута {target}.')
+        if not set(route.kwargs) <= set(kwargs):
+            raise ValueError(f'В базе нет данных для маршрута {target}.')
+        path = route_path(route, user, kwargs)
+    client = make_client()
+    with quiet_loggers(), isolated(client), profile_templates() as templates:
+        with profile() as total:
+            for _ in range(requests):
+                if as_author:
+                    login(client, user)
+                cache.clear()
+                response = client.get(path)
+    return (
+        path,
+        response.status_code,
+        total.template_time / requests,
+        [
+            (label, calls / requests, duration / requests)
+            for label, calls, duration in templates.breakdown()
+        ],
+    )
+
+
+def compare(results, baseline, threshold):
+    """
+    Регрессии относительно baseline: число запросов к базе
+    не должно расти вовсе, остальное — не больше чем на threshold.
+    """
+    regressions = []
+    for key, metrics in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for metric in METRICS:
+            new_value, old_value = metrics[metric], old[metric]
+            if metric == 'queries':
+                worse = new_value > old_value
+            elif metric == 'size':
+                worse = new_value > old_value * (1 + threshold)
+            else:
+                worse = (
+                    new_value > old_value * (1 + threshold)
+                    and new_value - old_value > NOISE_MS
+                )
+            if worse:
+                regressions.append((key, metric, old_value, new_value))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2, sort_keys=True)
@@ -0,0 +1,150 @@
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+
+VERSION_KEY = 'blog:version:{}'
+
+
+def feed_tags(post_id=None, category_id=None, author_id=None):
+    """Теги кеша, которые зависят от поста: лента, категория, автор."""
+    tags = ['feed']
+    if post_id is not None:
+        tags.append(f'post:{post_id}')
+    if category_id is not None:
+        tags.append(f'category:{category_id}')
+    if author_id is not None:
+        tags.append(f'author:{author_id}')
+    return tags
+
+
+def get_versions(*tags):
+    """
+    Текущие версии тегов. Версия — число, которое растёт при каждом
+    изменении данных тега; ключи кеша включают версии своих тегов,
+    поэтому устаревшие записи просто перестают запрашиваться.
+    """
+    keys = {VERSION_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, time.time_ns(), None)
+        found[key] = cache.get(key)
+    return {tag: found[key] for key, tag in keys.items()}
+
+
+def bump_versions(*tags):
+    for tag in set(tags):
+        key = VERSION_KEY.format(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def make_key(prefix, tags, *parts):
+    versions = get_versions(*tags)
+    return ':'.join([
+        prefix,
+        *(f'{tag}.{versions[tag]}' for tag in tags),
+        *map(str, parts),
+    ])
+
+
+def card_tags(post):
+    """Теги данных, показанных в карточке поста."""
+    return [
+        f'post:{post.pk}',
+        f'category:{post.category_id}',
+        f'location:{post.location_id}',
+        f'user:{post.author_id}',
+    ]
+
+
+def prime_card_versions(posts):
+    """
+    Вычислить версии карточек постов одним обращением к кешу.
+    Версия карточки меняется вместе с постом, его категорией,
+    местом, автором и числом комментариев.
+    """
+    posts = list(posts)
+    versions = get_versions(
+        *{tag for post in posts for tag in card_tags(post)}
+    )
+    for post in posts:
+        post._card_version = '.'.join([
+            *(str(versions[tag]) for tag in card_tags(post)),
+            str(post.comment_count),
+        ])
+
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+
+def _count_page_cache(request, result):
+    # metrics импортирует модели, а модели — этот модуль.
+    from . import metrics
+
+    match = request.resolver_match
+    metrics.PAGE_CACHE_REQUESTS.labels(
+        match.view_name if match else 'unresolved', result
+    ).inc()
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кешировать страницу целиком для гостей.
+    Ключ строится из адреса страницы и версий тегов,
+    которые возвращает get_page_cache_tags() (по умолчанию —
+    page_cache_tags, то есть лента целиком): при изменении
+    поста, комментария, категории, места или пользователя
+    сигналы повышают версии только затронутых тегов.
+    Теги страницы запоминаются по её адресу, чтобы при
+    попадании в кеш не обращаться к базе вовсе. В адрес входят
+    только параметры из page_cache_params: остальные view не читает,
+    и они не должны плодить записи в кеше.
+    """
+
+    page_cache_timeout = PAGE_CACHE_TIMEOUT
+    page_cache_tags = ('feed',)
+    page_cache_params = ('page', 'cursor')
+
+    def get_page_cache_tags(self):
+        return list(self.page_cache_tags)
+
+    def get_page_cache_path(self, request):
+        params = urlencode([
+            (name, request.GET[name])
+            for name in self.page_cache_params if name in request.GET
+        ])
+        return f'{request.path}?{params}' if params else request.path
+
+    def dispatch(self, request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return super().dispatch(request, *args, **kwargs)
+        path = self.get_page_cache_path(request)
+        tags = cache.get(f'blog:page_tags:{path}')
+        if tags is not None:
+            response = cache.get(make_key('blog:page', tags, path))
+            if response is not None:
+                _count_page_cache(request, 'hit')
+                response['X-Page-Cache'] = 'hit'
+                return response
+        _count_page_cache(request, 'miss')
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['X-Page-Cache'] = 'miss'
+            response.add_post_render_callback(
+                lambda response: self._store_page(path, response)
+            )
+        return response
+
+    def _store_page(self, path, response):
+        tags = self.get_page_cache_tags()
+        cache.set(f'blog:page_tags:{path}', tags, self.page_cache_timeout)
+        cache.set(
+            make_key('blog:page', tags, path),
+            response,
+            self.page_cache_timeout
+        )
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import CategoryFeedEntry, Post
+
+
+def is_enabled():
+    """
+    Вести ли материализованные ленты категорий (CategoryFeedEntry).
+    Тогда страница категории читается одним проходом по индексу
+    category_feed_idx без соединения с категорией и проверок видимости.
+    """
+    return getattr(settings, 'BLOG_CATEGORY_FEED_TABLE', False)
+
+
+def _entries(posts):
+    return [
+        CategoryFeedEntry(
+            category_id=post.category_id,
+            post_id=post.pk,
+            pub_date=post.pub_date
+        )
+        for post in posts
+    ]
+
+
+def sync_post(post):
+    if not is_enabled():
+        return
+    if post.is_visible:
+        CategoryFeedEntry.objects.update_or_create(
+            post_id=post.pk,
+            defaults={
+                'category_id': post.category_id,
+                'pub_date': post.pub_date,
+            }
+        )
+    else:
+        CategoryFeedEntry.objects.filter(post_id=post.pk).delete()
+
+
+def add_posts(post_ids):
+    """Добавить в ленты посты, ставшие видимыми."""
+    if not is_enabled():
+        return
+    posts = Post.objects.filter(pk__in=post_ids, is_visible=True).only(
+        'pk', 'category_id', 'pub_date'
+    )
+    CategoryFeedEntry.objects.bulk_create(
+        _entries(posts), ignore_conflicts=True
+    )
+
+
+def _fill(posts, batch_size):
+    last_pk = 0
+    created = 0
+    while True:
+        batch = list(
+            posts.filter(pk__gt=last_pk).order_by('pk').only(
+                'pk', 'category_id', 'pub_date'
+            )[:batch_size]
+        )
+        if not batch:
+            return created
+        CategoryFeedEntry.objects.bulk_create(
+            _entries(batch), ignore_conflicts=True
+        )
+        created += len(batch)
+        last_pk = batch[-1].pk
+
+
+@transaction.atomic
+def sync_category(category, batch_size=1000):
+    """Пересобрать ленту одной категории."""
+    if not is_enabled():
+        return
+    CategoryFeedEntry.objects.filter(category=category).delete()
+    if category.is_published:
+        _fill(
+            Post.objects.filter(category=category, is_visible=True),
+            batch_size
+        )
+
+
+def rebuild(batch_size=1000):
+    """Пересобрать ленты всех категорий; возвращает число записей."""
+    with transaction.atomic():
+        CategoryFeedEntry.objects.all().delete()
+        return _fill(Post.objects.filter(is_visible=True), batch_size)
@@ -0,0 +1,347 @@
+import csv
+import json
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from django.core import serializers
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from . import category_feed, search
+from .models import Comment, Post
+from .scheduling import reset_schedule
+
+
+# Порядок загрузки: модель идёт после тех, на кого ссылается.
+# Модели, которых нет в списке, загружаются после перечисленных.
+IMPORT_ORDER = (
+    'blog.category',
+    'blog.location',
+    'auth.user',
+    'blog.post',
+    'blog.comment',
+)
+READ_SIZE = 64 * 1024
+EXPORT_CHUNK_SIZE = 2000
+WRITE_SIZE = 64 * 1024
+
+
+def _skip_separators(buffer, started):
+    """
+    Пропустить пробелы, открывающую скобку и запятые перед элементом.
+    Возвращает остаток буфера, начат ли массив и закончился ли он.
+    """
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            return buffer, started, False
+        if not started:
+            if buffer[0] != '[':
+                raise ValueError('Ожидался JSON-массив.')
+            started = True
+        elif buffer[0] == ']':
+            return buffer, started, True
+        elif buffer[0] != ',':
+            return buffer, started, False
+        buffer = buffer[1:]
+
+
+def iter_json_array(stream, read_size=READ_SIZE):
+    """
+    Элементы JSON-массива из потока по одному.
+    В памяти одновременно лежит только непрочитанный хвост буфера,
+    поэтому размер файла не важен — важен размер одного элемента.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = eof = False
+    while True:
+        buffer, started, finished = _skip_separators(buffer, started)
+        if finished:
+            return
+        if buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item
+                buffer = buffer[end:]
+                continue
+        if eof:
+            raise ValueError('Файл оборвался посреди JSON-массива.')
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buffer += chunk
+
+
+@contextmanager
+def keep_timestamps(model):
+    """
+    bulk_create() вызывает pre_save(), и поля auto_now/auto_now_add
+    получают текущее время. Внутри блока время берётся из объектов.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+class DumpImporter:
+    """
+    Загрузка дампа в формате dumpdata пачками через bulk_create.
+    Объекты копятся по моделям; когда пачка модели заполнена,
+    сначала сохраняются пачки моделей, от которых она зависит.
+    Первичные ключи сохраняются: существующие строки обновляются.
+    Сигналы при этом не отправляются, поэтому вычисляемые поля
+    нужно пересчитать после загрузки (см. команду import_dump).
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.pending = {}
+        self.counts = {}
+
+    def order(self, model):
+        label = _label(model)
+        if label in IMPORT_ORDER:
+            return IMPORT_ORDER.index(label)
+        return len(IMPORT_ORDER)
+
+    def add(self, item):
+        (deserialized,) = serializers.deserialize(
+            'python', [item], ignorenonexistent=True
+        )
+        model = type(deserialized.object)
+        batch = self.pending.setdefault(model, [])
+        batch.append(deserialized)
+        if len(batch) >= self.batch_size:
+            for other in sorted(self.pending, key=self.order):
+                if self.order(other) <= self.order(model):
+                    self.flush(other)
+
+    def flush(self, model):
+        batch = self.pending.pop(model, [])
+        if not batch:
+            return
+        objects = [deserialized.object for deserialized in batch]
+        if model is Post:
+            for post in objects:
+                post.excerpt = post.make_excerpt()
+        existing = set(
+            model._base_manager.filter(
+                pk__in=[obj.pk for obj in objects]
+            ).values_list('pk', flat=True)
+        )
+        fields = [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        model._base_manager.bulk_update(
+            [obj for obj in objects if obj.pk in existing], fields
+        )
+        with keep_timestamps(model):
+            model._base_manager.bulk_create(
+                [obj for obj in objects if obj.pk not in existing]
+            )
+        self.flush_m2m(model, batch)
+        self.counts[model] = self.counts.get(model, 0) + len(batch)
+
+    def flush_m2m(self, model, batch):
+        """Связи многие-ко-многим пачки заменяются связями из дампа."""
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            if not through._meta.auto_created or not any(
+                field.name in (deserialized.m2m_data or {})
+                for deserialized in batch
+            ):
+                continue
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            through._base_manager.filter(**{
+                f'{source}__in': [d.object.pk for d in batch]
+            }).delete()
+            through._base_manager.bulk_create([
+                through(**{
+                    f'{source}_id': deserialized.object.pk,
+                    f'{target}_id': value,
+                })
+                for deserialized in batch
+                for value in (deserialized.m2m_data or {}).get(field.name, ())
+            ])
+
+    def load(self, stream):
+        for item in iter_json_array(stream):
+            self.add(item)
+        for model in sorted(self.pending, key=self.order):
+            self.flush(model)
+        return self.counts
+
+    def reset_sequences(self):
+        reset_sequences(list(self.counts))
+
+
+def reset_sequences(models):
+    """Счётчики ключей — за максимальным id (после вставки с явными id)."""
+    sql = connection.ops.sequence_reset_sql(no_style(), models)
+    if sql:
+        with connection.cursor() as cursor:
+            for statement in sql:
+                cursor.execute(statement)
+
+
+def rebuild_derived(stdout):
+    """
+    Перестроить то, что после сохранения поста обновляют сигналы:
+    ленты категорий, поисковый индекс, расписание и кеш.
+    """
+    if category_feed.is_enabled():
+        call_command('rebuild_category_feed', stdout=stdout)
+    if search.is_supported():
+        call_command('rebuild_search_index', stdout=stdout)
+    reset_schedule()
+    cache.clear()
+
+
+Export = namedtuple(
+    'Export', 'model columns date_field category_field author_field'
+)
+
+# Столбцы выгрузки: имя столбца -> путь к полю для values_list().
+EXPORTS = {
+    'posts': Export(
+        Post,
+        {
+            'id': 'id',
+            'title': 'title',
+            'text': 'text',
+            'pub_date': 'pub_date',
+            'created_at': 'created_at',
+            'is_published': 'is_published',
+            'author': 'author__username',
+            'category': 'category__slug',
+            'category_title': 'category__title',
+            'location': 'location__name',
+            'comment_count': 'comment_count',
+        },
+        'pub_date', 'category', 'author',
+    ),
+    'comments': Export(
+        Comment,
+        {
+            'id': 'id',
+            'post': 'post_id',
+            'post_title': 'post__title',
+            'author': 'author__username',
+            'category': 'post__category__slug',
+            'created_at': 'created_at',
+            'text': 'text',
+        },
+        'created_at', 'post__category', 'author',
+    ),
+}
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def export_rows(kind, since=None, until=None, category=None, author=None,
+                chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Строки выгрузки — словари столбец -> значение.
+    Модели не создаются, а iterator() читает результат кусками
+    (в PostgreSQL — серверным курсором), так что память не зависит
+    от числа строк. Даты включаются в диапазон с обеих сторон.
+    """
+    export = EXPORTS[kind]
+    queryset = export.model._base_manager.all()
+    date_field = f'{export.date_field}__date'
+    if since:
+        queryset = queryset.filter(**{f'{date_field}__gte': since})
+    if until:
+        queryset = queryset.filter(**{f'{date_field}__lte': until})
+    if category:
+        queryset = queryset.filter(**{export.category_field: category})
+    if author:
+        queryset = queryset.filter(**{export.author_field: author})
+    names = list(export.columns)
+    rows = queryset.order_by('pk').values_list(
+        *export.columns.values()
+    ).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield dict(zip(names, row))
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class _Line:
+    """Буфер для csv.writer: writerow() возвращает готовую строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(kind, format, **filters):
+    """Выгрузка построчно в формате ndjson или csv."""
+    rows = export_rows(kind, **filters)
+    if format == 'ndjson':
+        for row in rows:
+            yield json.dumps(
+                row, cls=DjangoJSONEncoder, ensure_ascii=False
+            ) + '\n'
+        return
+    writer = csv.writer(_Line())
+    yield writer.writerow(EXPORTS[kind].columns)
+    for row in rows:
+        yield writer.writerow([_plain(value) for value in row.values()])
+
+
+def encode_chunks(lines, compress=False, size=WRITE_SIZE):
+    """
+    Строки в байтах, собранные в куски около size байт,
+    при compress=True — сжатые в формат gzip.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = []
+    buffered = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= size:
+            chunk = b''.join(buffer)
+            buffer = []
+            buffered = 0
+            if compress:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    chunk = b''.join(buffer)
+    if compress:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.template.loader import render_to_string
+from django.urls import Resolver404, resolve
+
+from .models import Comment, Post
+
+
+HEARTBEAT_INTERVAL = 15
+SUBSCRIBER_QUEUE_SIZE = 100
+REPLAY_LIMIT = 100
+STREAM_URL_NAME = 'blog:comment_stream'
+
+
+class CommentBroker:
+    """
+    Рассылка новых комментариев внутри процесса.
+    Подписчик — asyncio-очередь в цикле событий ASGI-сервера;
+    публиковать можно из любого потока (синхронные view работают
+    в пуле потоков), события передаются через call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, post_id):
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[post_id].add(
+                (asyncio.get_running_loop(), queue)
+            )
+        return queue
+
+    def unsubscribe(self, post_id, queue):
+        with self._lock:
+            subscribers = self._subscribers[post_id]
+            subscribers.difference_update(
+                {item for item in subscribers if item[1] is queue}
+            )
+            if not subscribers:
+                del self._subscribers[post_id]
+
+    def subscriber_count(self, post_id=None):
+        with self._lock:
+            if post_id is not None:
+                return len(self._subscribers.get(post_id, ()))
+            return sum(map(len, self._subscribers.values()))
+
+    def publish(self, post_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(post_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._put, queue, event)
+
+    @staticmethod
+    def _put(queue, event):
+        # Медленный читатель пропускает события: при переподключении
+        # он догонит пропущенное по Last-Event-ID.
+        if not queue.full():
+            queue.put_nowait(event)
+
+
+broker = CommentBroker()
+
+
+def comment_event(comment):
+    return {
+        'id': comment.pk,
+        'html': render_to_string(
+            'includes/comment_list.html',
+            {'comments': [comment], 'post': comment.post}
+        ),
+    }
+
+
+def publish_comment(comment):
+    broker.publish(comment.post_id, comment_event(comment))
+
+
+def format_event(event):
+    return (
+        f'id: {event["id"]}\n'
+        f'event: comment\n'
+        f'data: {json.dumps(event, ensure_ascii=False)}\n\n'
+    ).encode()
+
+
+def _stream_exists(post_id):
+    return Post.objects.filter(pk=post_id, is_visible=True).exists()
+
+
+def _missed_events(post_id, last_event_id):
+    comments = Comment.objects.filter(
+        post_id=post_id, pk__gt=last_event_id
+    ).select_related('author', 'post').order_by('pk')[:REPLAY_LIMIT]
+    return [comment_event(comment) for comment in comments]
+
+
+async def comment_stream(scope, receive, send, post_id):
+    """Поток Server-Sent Events с новыми комментариями к посту."""
+    if not await sync_to_async(_stream_exists)(post_id):
+        await send({
+            'type': 'http.response.start',
+            'status': 404,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    queue = broker.subscribe(post_id)
+    disconnect = next_event = None
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        headers = dict(scope.get('headers', ()))
+        last_event_id = headers.get(b'last-event-id', b'').decode()
+        if last_event_id.isdigit():
+            for event in await sync_to_async(_missed_events)(
+                post_id, int(last_event_id)
+            ):
+                await send({
+                    'type': 'http.response.body',
+                    'body': format_event(event),
+                    'more_body': True,
+                })
+        disconnect = asyncio.ensure_future(receive())
+        while True:
+            next_event = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {disconnect, next_event},
+                timeout=HEARTBEAT_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                return
+            if next_event in done:
+                body = format_event(next_event.result())
+            else:
+                next_event.cancel()
+                body = b': keepalive\n\n'
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+    finally:
+        # Ожидания отменяются и при обрыве: ошибка send()
+        # или отмена задачи сервером.
+        for future in (disconnect, next_event):
+            if future is not None:
+                future.cancel()
+        broker.unsubscribe(post_id, queue)
+
+
+class CommentStreamRouter:
+    """
+    ASGI-приложение: потоки комментариев обслуживаются здесь,
+    без потока на соединение, остальное передаётся Django.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        match = None
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            try:
+                match = resolve(scope['path'])
+            except Resolver404:
+                pass
+        if match is None or match.view_name != STREAM_URL_NAME:
+            return await self.application(scope, receive, send)
+        return await comment_stream(
+            scope, receive, send, match.kwargs['post_id']
+        )
@@ -1,7 +1,7 @@
 from django import forms
 from django.forms import ModelChoiceField 
 
-from .models import Post, Comment
+from .models import Category, Comment, Post, User
 
 
 class LocationChoiceField(ModelChoiceField): 
@@ -32,3 +32,39 @@ class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class ExportForm(forms.Form):
+    kind = forms.ChoiceField(
+        label='Что выгрузить',
+        choices=(('posts', 'Публикации'), ('comments', 'Комментарии'))
+    )
+    format = forms.ChoiceField(
+        label='Формат', choices=(('ndjson', 'NDJSON'), ('csv', 'CSV'))
+    )
+    gzip = forms.BooleanField(label='Сжать gzip', required=False)
+    since = forms.DateField(label='С даты', required=False)
+    until = forms.DateField(label='По дату', required=False)
+    category = forms.ModelChoiceField(
+        Category.objects.all(), to_field_name='slug', required=False,
+        label='Категория'
+    )
+    author = forms.ModelChoiceField(
+        User.objects.all(), to_field_name='username', required=False,
+        label='Автор'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since, until = cleaned_data.get('since'), cleaned_data.get('until')
+        if since and until and since > until:
+            raise forms.ValidationError(
+                'Начальная дата позже конечной.'
+            )
+        return cleaned_data
+
+    def filters(self):
+        return {
+            name: self.cleaned_data[name]
+            for name in ('since', 'until', 'category', 'author')
+        }
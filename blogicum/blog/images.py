@@ -0,0 +1,101 @@
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import features, Image, ImageOps, UnidentifiedImageError
+
+
+# Ширина изображения на странице (в CSS-пикселях) для каждого места показа.
+VARIANT_WIDTHS = {
+    'card': 400,
+    'detail': 600,
+}
+SCALES = (1, 2)
+VARIANTS_DIR = 'variants'
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 6},
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+}
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+
+def variant_formats(image):
+    """Форматы производных: WebP и запасной, понятный любому браузеру."""
+    fallback = 'PNG' if image.mode in ('RGBA', 'LA', 'P') else 'JPEG'
+    if features.check('webp'):
+        return ('WEBP', fallback)
+    return (fallback,)
+
+
+def _widths(width, original_width):
+    """Ширины для 1x и 2x; изображение никогда не увеличивается."""
+    return sorted({min(width * scale, original_width) for scale in SCALES})
+
+
+def _encode(image, image_format):
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image_format != 'JPEG' and image.mode == 'P':
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    image.save(buffer, image_format, **SAVE_OPTIONS[image_format])
+    return buffer.getvalue()
+
+
+def make_variants(image_file):
+    """
+    Сохранить уменьшенные копии изображения поста
+    и вернуть их описание для поля Post.image_variants:
+    размеры оригинала и по списку копий на каждое место показа.
+    Файл, который не удалось прочитать как изображение,
+    остаётся без копий — шаблон покажет оригинал.
+    """
+    try:
+        image_file.open('rb')
+        with Image.open(image_file) as original:
+            original = ImageOps.exif_transpose(original)
+            original.load()
+    except (OSError, ValueError, UnidentifiedImageError):
+        return {}
+    finally:
+        image_file.close()
+    stem = posixpath.splitext(posixpath.basename(image_file.name))[0]
+    directory = posixpath.join(image_file.field.upload_to, VARIANTS_DIR)
+    variants = {'width': original.width, 'height': original.height}
+    formats = variant_formats(original)
+    for kind, width in VARIANT_WIDTHS.items():
+        variants[kind] = []
+        for variant_width in _widths(width, original.width):
+            resized = original.resize(
+                (
+                    variant_width,
+                    max(round(
+                        original.height * variant_width / original.width
+                    ), 1)
+                ),
+                Image.Resampling.LANCZOS
+            )
+            for image_format in formats:
+                name = image_file.storage.save(
+                    posixpath.join(directory, (
+                        f'{stem}-{kind}-{variant_width}w.'
+                        f'{EXTENSIONS[image_format]}'
+                    )),
+                    ContentFile(_encode(resized, image_format))
+                )
+                variants[kind].append({
+                    'name': name,
+                    'format': image_format.lower(),
+                    'width': resized.width,
+                    'height': resized.height,
+                })
+    return variants
+
+
+def variant_names(variants):
+    return [
+        variant['name']
+        for kind in VARIANT_WIDTHS
+        for variant in variants.get(kind, ())
+    ]
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Замерить время ответа (p50/p95), число и время SQL-запросов, '
+        'время шаблонов и размер ответа для всех страниц блога, '
+        'страниц pages и авторизации. Запускать на базе, наполненной '
+        'командой seed. С --baseline сравнивает с сохранёнными '
+        'результатами и завершается с ошибкой при регрессии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=20,
+            help='Сколько раз запрашивать каждую страницу.'
+        )
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кеш перед запросами.'
+        )
+        parser.add_argument(
+            '--baseline', default=settings.BASE_DIR / 'benchmark.json',
+            help='Файл с базовыми результатами.'
+        )
+        parser.add_argument(
+            '--save', action='store_true',
+            help='Записать результаты как базовые вместо сравнения.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост метрик, доля (0.2 — на 20%%).'
+        )
+
+    def handle(self, *args, requests, warm, baseline, save, threshold,
+               **options):
+        try:
+            results = benchmarks.run(requests, warm)
+        except ValueError as error:
+            raise CommandError(error)
+        self.print_table(results)
+        if save:
+            benchmarks.save_baseline(baseline, results)
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовые результаты записаны в {baseline}'
+            ))
+            return
+        try:
+            previous = benchmarks.load_baseline(baseline)
+        except FileNotFoundError:
+            self.stdout.write(
+                f'Нет файла {baseline}: запустите команду с --save.'
+            )
+            return
+        regressions = benchmarks.compare(results, previous, threshold)
+        for key, metric, old, new in regressions:
+            self.stderr.write(f'{key}: {metric} {old:g} -> {new:g}')
+        if regressions:
+            raise CommandError(f'Регрессий: {len(regressions)}')
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
+
+    def print_table(self, results):
+        self.stdout.write(
+            f'{"страница":<44} {"код":>4} {"p50 мс":>8} {"p95 мс":>8} '
+            f'{"SQL":>5} {"SQL мс":>8} {"шабл. мс":>8} {"КБ":>7}'
+        )
+        for key, metrics in sorted(results.items()):
+            self.stdout.write(
+                f'{key:<44} {metrics["status"]:>4} '
+                f'{metrics["p50"]:>8.2f} {metrics["p95"]:>8.2f} '
+                f'{metrics["queries"]:>5} {metrics["sql"]:>8.2f} '
+                f'{metrics["template"]:>8.2f} '
+                f'{metrics["size"] / 1024:>7.1f}'
+            )
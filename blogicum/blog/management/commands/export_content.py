@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import dumps
+from blog.forms import ExportForm
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгрузить публикации или комментарии в NDJSON или CSV потоком: '
+        'память не растёт с числом строк. Файл с расширением .gz '
+        'сжимается gzip; без пути выгрузка пишется в stdout.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=dumps.EXPORTS)
+        parser.add_argument(
+            'output', nargs='?', help='Путь к файлу выгрузки.'
+        )
+        parser.add_argument(
+            '--format', choices=dumps.EXPORT_FORMATS, default='ndjson'
+        )
+        parser.add_argument('--since', help='С даты (ГГГГ-ММ-ДД).')
+        parser.add_argument('--until', help='По дату (ГГГГ-ММ-ДД).')
+        parser.add_argument('--category', help='Слаг категории.')
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=dumps.EXPORT_CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз.'
+        )
+
+    def handle(self, *args, kind, output, format, chunk_size, **options):
+        form = ExportForm({
+            'kind': kind,
+            'format': format,
+            **{
+                name: options[name]
+                for name in ('since', 'until', 'category', 'author')
+                if options[name]
+            }
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        lines = dumps.export_lines(
+            kind, format, chunk_size=chunk_size, **form.filters()
+        )
+        if not output:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        try:
+            with open(output, 'wb') as file:
+                for chunk in dumps.encode_chunks(
+                    lines, compress=output.endswith('.gz')
+                ):
+                    file.write(chunk)
+        except OSError as error:
+            raise CommandError(f'Не удалось записать {output}: {error}')
+        self.stdout.write(self.style.SUCCESS(f'Выгрузка записана в {output}'))
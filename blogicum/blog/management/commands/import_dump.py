@@ -0,0 +1,60 @@
+import gzip
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from blog.dumps import DumpImporter, rebuild_derived
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Загрузить дамп dumpdata (JSON, можно .gz), читая его потоком '
+        'и сохраняя объекты пачками. В отличие от loaddata, память '
+        'не растёт с размером дампа, а сигналы не отправляются: '
+        'вычисляемые поля пересчитываются после загрузки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу дампа.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько объектов одной модели сохранять за раз.'
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        opener = gzip.open if path.endswith('.gz') else open
+        importer = DumpImporter(batch_size)
+        try:
+            with opener(path, 'rt', encoding='utf-8') as stream:
+                with transaction.atomic():
+                    with connection.constraint_checks_disabled():
+                        counts = importer.load(stream)
+                    connection.check_constraints(
+                        table_names=[
+                            model._meta.db_table for model in counts
+                        ]
+                    )
+                    importer.reset_sequences()
+        except (OSError, ValueError, DeserializationError) as error:
+            raise CommandError(f'Не удалось загрузить {path}: {error}')
+        for model, count in counts.items():
+            self.stdout.write(f'{model._meta.label}: {count}')
+        self.update_derived()
+        self.stdout.write(self.style.SUCCESS('Дамп загружен.'))
+
+    def update_derived(self):
+        """Пересчитать то, что при обычном сохранении делают сигналы."""
+        visible = Q(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+            category__is_published=True
+        )
+        Post.objects.filter(visible).update(is_visible=True)
+        Post.objects.exclude(visible).update(is_visible=False)
+        call_command('recount_comments', stdout=self.stdout)
+        rebuild_derived(self.stdout)
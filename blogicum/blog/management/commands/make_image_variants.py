@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.tasks import make_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Сделать уменьшенные копии фото для постов, у которых их нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true', dest='remake',
+            help='Пересоздать копии у всех постов с фото.'
+        )
+        parser.add_argument(
+            '--background', action='store_true',
+            help='Не делать копии сразу, а поставить задачи в очередь.'
+        )
+
+    def handle(self, *args, remake, background, **options):
+        posts = Post.objects.exclude(image='')
+        if not remake:
+            posts = posts.filter(image_variants={})
+        run = make_image_variants.delay if background else make_image_variants
+        updated = 0
+        for pk, image, variants in posts.values_list(
+            'pk', 'image', 'image_variants'
+        ).iterator():
+            run(post_id=pk, image=image, obsolete=variants)
+            updated += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {updated}'
+        ))
@@ -0,0 +1,99 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.caching import bump_versions, feed_tags
+from blog.images import VARIANT_WIDTHS, variant_names
+from blog.models import Post, StoredFile
+
+
+class Command(BaseCommand):
+    help = (
+        'Перенести фото постов и их копии в хранилище с именами '
+        'по хешу содержимого и пересчитать ссылки на файлы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, сколько файлов нужно перенести.'
+        )
+        parser.add_argument(
+            '--keep-old', action='store_true',
+            help='Не удалять файлы со старыми именами.'
+        )
+
+    def handle(self, *args, dry_run, keep_old, **options):
+        self.storage = Post._meta.get_field('image').storage
+        self.dry_run = dry_run
+        self.moved = {}
+        posts = Post.objects.exclude(image='').only(
+            'image', 'image_variants', 'category_id', 'author_id'
+        )
+        for post in posts.iterator():
+            self.migrate_post(post)
+        if dry_run:
+            self.stdout.write(f'Нужно перенести файлов: {len(self.moved)}')
+            return
+        references = self.recount()
+        if not keep_old:
+            for name in self.moved:
+                if name not in references:
+                    self.storage.delete(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {len(self.moved)}, '
+            f'файлов в хранилище: {len(references)}'
+        ))
+
+    def migrate_post(self, post):
+        """Перенести фото поста и его копии и обновить ссылки в посте."""
+        changes = {}
+        image = self.move(post.image.name)
+        if image != post.image.name:
+            changes['image'] = image
+        variants = post.image_variants
+        for kind in VARIANT_WIDTHS:
+            for variant in variants.get(kind, ()):
+                name = self.move(variant['name'])
+                if name != variant['name']:
+                    variant['name'] = name
+                    changes['image_variants'] = variants
+        if changes and not self.dry_run:
+            Post.objects.filter(pk=post.pk).update(**changes)
+            bump_versions(
+                *feed_tags(post.pk, post.category_id, post.author_id)
+            )
+
+    def move(self, name):
+        """Сохранить файл под именем по содержимому; вернуть новое имя."""
+        if self.storage.is_content_name(name):
+            return name
+        if name not in self.moved:
+            if not self.storage.exists(name):
+                self.stderr.write(f'Файл не найден: {name}')
+                return name
+            if self.dry_run:
+                self.moved[name] = name
+                return name
+            with self.storage.open(name) as content:
+                self.moved[name] = self.storage.save(name, content)
+        return self.moved[name]
+
+    def recount(self):
+        """Заново посчитать ссылки на файлы по всем постам."""
+        references = Counter()
+        for image, variants in Post.objects.exclude(image='').values_list(
+            'image', 'image_variants'
+        ).iterator():
+            references.update([image, *variant_names(variants)])
+        with transaction.atomic():
+            StoredFile.objects.all().delete()
+            StoredFile.objects.bulk_create(
+                [
+                    StoredFile(name=name, references=count)
+                    for name, count in references.items()
+                ],
+                batch_size=1000
+            )
+        return references
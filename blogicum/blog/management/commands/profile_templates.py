@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Отрендерить страницу на данных из базы и вывести время '
+        'по шаблонам, include, тегам и фильтрам, самые долгие сверху. '
+        'Запускать на базе, наполненной командой seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'target', help='Имя маршрута (blog:index) или путь (/search/?q=).'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=20,
+            help='Сколько раз запрашивать страницу.'
+        )
+        parser.add_argument(
+            '--as-author', action='store_true',
+            help='Запрашивать от имени автора самого обсуждаемого поста.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=30,
+            help='Сколько строк вывести.'
+        )
+
+    def handle(self, *args, target, requests, as_author, limit, **options):
+        try:
+            path, status, total, rows = benchmarks.profile_page(
+                target, requests, as_author
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            f'{path}: код {status}, шаблоны {total * 1000:.2f} мс '
+            f'на запрос (среднее по {requests})'
+        )
+        self.stdout.write(
+            f'{"мс":>8} {"доля":>6} {"вызовов":>8}  метка'
+        )
+        for label, calls, duration in rows[:limit]:
+            share = duration / total if total else 0
+            self.stdout.write(
+                f'{duration * 1000:>8.2f} {share:>6.0%} {calls:>8.1f}  {label}'
+            )
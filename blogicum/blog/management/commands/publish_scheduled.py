@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.scheduling import next_publication, publish_due_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Показать в ленте отложенные посты, время публикации которых '
+        'наступило. С --loop ждать следующей публикации и повторять.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, просыпаясь к следующей публикации.'
+        )
+        parser.add_argument(
+            '--max-sleep', type=float, default=60,
+            help='Наибольшая пауза между проверками, в секундах.'
+        )
+
+    def handle(self, *args, loop, max_sleep, **options):
+        while True:
+            published = publish_due_posts()
+            if published:
+                self.stdout.write(
+                    f'Опубликовано постов: {len(published)}'
+                )
+            if not loop:
+                break
+            upcoming = next_publication()
+            pause = max_sleep
+            if upcoming is not None:
+                pause = min(
+                    pause, (upcoming - timezone.now()).total_seconds()
+                )
+            time.sleep(max(pause, 0))
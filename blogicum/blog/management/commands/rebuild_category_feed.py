@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import category_feed
+
+
+class Command(BaseCommand):
+    help = 'Перестроить материализованные ленты категорий.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько записей добавлять за один запрос.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        if not category_feed.is_enabled():
+            raise CommandError(
+                'Ленты категорий отключены: BLOG_CATEGORY_FEED_TABLE = False.'
+            )
+        created = category_feed.rebuild(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах категорий: {created}'
+        ))
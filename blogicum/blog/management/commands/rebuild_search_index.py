@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import search
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Перестроить полнотекстовый индекс постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов индексировать за один запрос.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        if not search.is_supported():
+            raise CommandError(
+                'Полнотекстовый поиск работает только с SQLite.'
+            )
+        indexed = search.rebuild(Post.objects.all(), batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {indexed}'
+        ))
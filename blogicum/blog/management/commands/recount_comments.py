@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать сохранённое число комментариев у публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько публикаций обновлять в одной транзакции.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        comment_count = Coalesce(Subquery(
+            Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+                'post'
+            ).annotate(count=Count('pk')).values('count')
+        ), 0)
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', flat=True
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                updated += Post.objects.filter(pk__in=batch).update(
+                    comment_count=comment_count
+                )
+            last_pk = batch[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано публикаций: {updated}'
+        ))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.dumps import rebuild_derived
+from blog.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполнить базу синтетическими пользователями, категориями, '
+        'местами, постами и комментариями для нагрузочных тестов. '
+        'С одним и тем же --seed на пустой базе данные совпадают.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument(
+            '--comments', type=float, default=5,
+            help='Среднее число комментариев к видимому посту.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=3 * 365,
+            help='За сколько дней до сегодняшнего распределить посты.'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=None,
+            help='Процессов для генерации текстов; 0 — без пула. '
+                 'По умолчанию по числу ядер.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько объектов вставлять одним запросом.'
+        )
+
+    def handle(self, *args, comments, **options):
+        seeder = Seeder(
+            seed=options['seed'],
+            users=options['users'],
+            categories=options['categories'],
+            locations=options['locations'],
+            posts=options['posts'],
+            comments_per_post=comments,
+            days=options['days'],
+            processes=options['processes'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        try:
+            seeder.run()
+        except ValueError as error:
+            raise CommandError(error)
+        rebuild_derived(self.stdout)
+        self.stdout.write(self.style.SUCCESS('База наполнена.'))
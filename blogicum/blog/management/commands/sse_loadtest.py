@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from blog.events import broker, comment_stream
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочная проверка потока комментариев: открыть много '
+        'подписок на один пост, разослать событие и замерить, '
+        'за сколько оно дошло до всех. Без --host подписки открываются '
+        'внутри процесса, с --host — настоящими соединениями к серверу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post', type=int,
+            help='id поста; по умолчанию последний опубликованный.'
+        )
+        parser.add_argument(
+            '--connections', type=int, default=2000,
+            help='Число одновременных подписок.'
+        )
+        parser.add_argument('--host', help='Адрес запущенного ASGI-сервера.')
+        parser.add_argument('--port', type=int, default=8000)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Сколько секунд держать соединения к серверу.'
+        )
+
+    def handle(self, *args, post, connections, host, port, duration,
+               **options):
+        if post is None:
+            post = Post.objects.filter(is_visible=True).values_list(
+                'id', flat=True
+            ).first()
+        if post is None:
+            raise CommandError('Нет опубликованных постов.')
+        if host:
+            report = asyncio.run(
+                self.remote(host, port, post, connections, duration)
+            )
+        else:
+            report = asyncio.run(self.local(post, connections))
+        for name, value in report.items():
+            self.stdout.write(f'{name}: {value}')
+
+    async def local(self, post_id, connections):
+        delivered = []
+        started = None
+        all_delivered = asyncio.Event()
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message.get('body', b'').startswith(b'id:'):
+                delivered.append(time.perf_counter() - started)
+                if len(delivered) == connections:
+                    all_delivered.set()
+
+        threads_before = threading.active_count()
+        opened = time.perf_counter()
+        scope = {'type': 'http', 'method': 'GET', 'headers': []}
+        tasks = [
+            asyncio.ensure_future(
+                comment_stream(scope, receive, send, post_id)
+            )
+            for _ in range(connections)
+        ]
+        while broker.subscriber_count(post_id) < connections:
+            await asyncio.sleep(0.01)
+        opened = time.perf_counter() - opened
+        threads = threading.active_count()
+        started = time.perf_counter()
+        await sync_to_async(broker.publish)(
+            post_id, {'id': 0, 'html': ''}
+        )
+        await asyncio.wait_for(all_delivered.wait(), 60)
+        disconnect.set()
+        await asyncio.gather(*tasks)
+        return {
+            'Подписок': connections,
+            'Открыты за, с': round(opened, 3),
+            'Потоков до/во время': f'{threads_before}/{threads}',
+            'Доставлено событий': len(delivered),
+            'Доставка всем за, мс': round(max(delivered) * 1000, 1),
+        }
+
+    async def remote(self, host, port, post_id, connections, duration):
+        path = reverse('blog:comment_stream', args=[post_id])
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+            f'Accept: text/event-stream\r\n\r\n'
+        ).encode()
+        stats = {'connected': 0, 'failed': 0, 'chunks': 0}
+
+        async def client():
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(request)
+                status = await reader.readline()
+                if b' 200 ' not in status:
+                    raise ConnectionError(status)
+            except (OSError, ConnectionError):
+                stats['failed'] += 1
+                return
+            stats['connected'] += 1
+            try:
+                while await asyncio.wait_for(reader.read(4096), duration):
+                    stats['chunks'] += 1
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                writer.close()
+
+        opened = time.perf_counter()
+        clients = [asyncio.ensure_future(client()) for _ in range(connections)]
+        await asyncio.sleep(duration)
+        await asyncio.gather(*clients)
+        return {
+            'Подписок': connections,
+            'Подключено': stats['connected'],
+            'Ошибок': stats['failed'],
+            'Получено фрагментов': stats['chunks'],
+            'Длительность, с': round(time.perf_counter() - opened, 1),
+        }
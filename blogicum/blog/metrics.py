@@ -0,0 +1,81 @@
+import os
+
+from django.db.models import Count
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from jobs.models import Job
+
+
+# Метрики меняются в каждом процессе без общих блокировок. Если задана
+# переменная окружения PROMETHEUS_MULTIPROC_DIR, значения пишутся
+# в файлы этого каталога и при опросе складываются по всем процессам.
+REQUESTS = Counter(
+    'blog_requests', 'HTTP-запросы', ('view', 'method', 'status')
+)
+REQUEST_DURATION = Histogram(
+    'blog_request_duration_seconds', 'Время ответа', ('view',)
+)
+DB_QUERIES = Histogram(
+    'blog_db_queries', 'Запросы к базе за один HTTP-запрос', ('view',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_DURATION = Histogram(
+    'blog_db_duration_seconds', 'Время запросов к базе за один HTTP-запрос',
+    ('view',),
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    'blog_cache_requests', 'Чтения из кеша', ('view', 'result')
+)
+PAGE_CACHE_REQUESTS = Counter(
+    'blog_page_cache_requests', 'Ответы гостям из кеша страниц',
+    ('view', 'result')
+)
+POSTS_CREATED = Counter('blog_posts_created', 'Созданные публикации')
+COMMENTS_CREATED = Counter('blog_comments_created', 'Созданные комментарии')
+
+
+def observe(view, method, status, result):
+    """Учесть HTTP-запрос по профилю result из profiling.profile()."""
+    view = view or 'unresolved'
+    REQUESTS.labels(view, method, status).inc()
+    REQUEST_DURATION.labels(view).observe(result.total_time)
+    DB_QUERIES.labels(view).observe(result.query_count)
+    DB_DURATION.labels(view).observe(result.sql_time)
+    if result.cache_hits:
+        CACHE_REQUESTS.labels(view, 'hit').inc(result.cache_hits)
+    if result.cache_misses:
+        CACHE_REQUESTS.labels(view, 'miss').inc(result.cache_misses)
+
+
+class QueueCollector:
+    """Очередь фоновых задач на момент опроса, по именам задач."""
+
+    def collect(self):
+        depth = GaugeMetricFamily(
+            'blog_job_queue_depth', 'Задачи в очереди', labels=('task',)
+        )
+        for task, count in Job.objects.filter(
+            status=Job.QUEUED
+        ).values_list('task').annotate(Count('id')).order_by():
+            depth.add_metric((task,), count)
+        yield depth
+
+
+def render():
+    """
+    Метрики в текстовом формате Prometheus: счётчики всех процессов
+    или, без PROMETHEUS_MULTIPROC_DIR, этого процесса, и очередь задач.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    queue = CollectorRegistry()
+    queue.register(QueueCollector())
+    return generate_latest(registry) + generate_latest(queue)
@@ -0,0 +1,144 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics, slow_queries
+from .profiling import profile_templates, request_profile
+from .scheduling import publish_if_due
+
+
+logger = logging.getLogger('blog.performance')
+
+
+class ScheduledPublicationMiddleware:
+    """Перед обработкой запроса показать посты, чьё время наступило."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        publish_if_due()
+        return self.get_response(request)
+
+
+class MetricsMiddleware:
+    """Счётчики и гистограммы каждого запроса для /metrics."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'BLOG_METRICS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_profile(request) as result:
+            response = self.get_response(request)
+        match = request.resolver_match
+        metrics.observe(
+            match.view_name if match else None,
+            request.method,
+            response.status_code,
+            result,
+        )
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Стоимость запроса: SQL, шаблоны, кеш и время целиком —
+    в заголовке Server-Timing и строкой JSON в лог blog.performance.
+    Замеряется доля BLOG_SERVER_TIMING_SAMPLE_RATE запросов,
+    остальные проходят без накладных расходов. Если запрос уже
+    замеряет MetricsMiddleware, используется его профиль.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'BLOG_SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(
+            settings, 'BLOG_SERVER_TIMING_SAMPLE_RATE', 1.0
+        )
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        with request_profile(request) as result:
+            response = self.get_response(request)
+        response['Server-Timing'] = server_timing(result)
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(result.total_time * 1000, 2),
+            'sql_ms': round(result.sql_time * 1000, 2),
+            'queries': result.query_count,
+            'template_ms': round(result.template_time * 1000, 2),
+            'cache_hits': result.cache_hits,
+            'cache_misses': result.cache_misses,
+        }))
+        return response
+
+
+class TemplateProfilerMiddleware:
+    """
+    Время рендеринга по шаблонам, include и тегам — строкой JSON
+    в лог blog.performance. Включается настройкой BLOG_TEMPLATE_PROFILER,
+    в лог попадают BLOG_TEMPLATE_PROFILER_LIMIT самых долгих меток.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'BLOG_TEMPLATE_PROFILER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limit = getattr(settings, 'BLOG_TEMPLATE_PROFILER_LIMIT', 20)
+
+    def __call__(self, request):
+        with profile_templates() as result:
+            response = self.get_response(request)
+        breakdown = result.breakdown()
+        if breakdown:
+            match = request.resolver_match
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'templates': [
+                    {'label': label, 'calls': calls,
+                     'ms': round(duration * 1000, 2)}
+                    for label, calls, duration in breakdown[:self.limit]
+                ],
+            }, ensure_ascii=False))
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """
+    Связать запросы к базе с HTTP-запросом: в логе медленных
+    запросов будут его адрес и view.
+    """
+
+    def __init__(self, get_response):
+        if getattr(settings, 'BLOG_SLOW_QUERY_MS', None) is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with slow_queries.handling(request):
+            return self.get_response(request)
+
+
+def server_timing(result):
+    """Значение заголовка Server-Timing для профиля запроса."""
+    return ', '.join((
+        f'sql;dur={result.sql_time * 1000:.2f};'
+        f'desc="SQL x{result.query_count}"',
+        f'tpl;dur={result.template_time * 1000:.2f};desc="Templates"',
+        f'cache;desc="hits {result.cache_hits}, '
+        f'misses {result.cache_misses}"',
+        f'total;dur={result.total_time * 1000:.2f}',
+    ))
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_category_feeds(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    CategoryFeedEntry = apps.get_model('blog', 'CategoryFeedEntry')
+    CategoryFeedEntry.objects.bulk_create(
+        CategoryFeedEntry(
+            category_id=post.category_id,
+            post_id=post.pk,
+            pub_date=post.pub_date
+        )
+        for post in Post.objects.filter(is_visible=True).iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='blog.category', verbose_name='Категория')),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='category_feed_entry', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'запись ленты категории',
+                'verbose_name_plural': 'Ленты категорий',
+                'default_related_name': 'feed_entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='categoryfeedentry',
+            index=models.Index(fields=['category', '-pub_date', '-post'], name='category_feed_idx'),
+        ),
+        migrations.RunPython(fill_category_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:27
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def make_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = []
+    for post in Post.objects.only('pk', 'text').iterator():
+        post.excerpt = Truncator(post.text).words(10, truncate=' …')
+        posts.append(post)
+        if len(posts) == 1000:
+            Post.objects.bulk_update(posts, ['excerpt'])
+            posts = []
+    Post.objects.bulk_update(posts, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_category_feed_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, help_text='Начало текста для карточки поста в ленте.', verbose_name='Анонс'),
+        ),
+        migrations.RunPython(make_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Размеры фото и его уменьшенные копии для страниц.', verbose_name='Копии фото'),
+        ),
+    ]
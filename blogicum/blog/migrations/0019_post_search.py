@@ -0,0 +1,72 @@
+import re
+
+import snowballstemmer
+from django.db import migrations
+
+
+# Копия правил индекса blog.search на момент миграции: миграция
+# не должна меняться вместе с модулем.
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'[а-яё]')
+STEMMERS = {
+    'russian': snowballstemmer.stemmer('russian'),
+    'english': snowballstemmer.stemmer('english'),
+}
+
+
+def stem_text(text):
+    stems = []
+    for word in WORD.findall(text or ''):
+        word = word.lower()
+        language = 'russian' if CYRILLIC.search(word) else 'english'
+        stems.append(STEMMERS[language].stemWord(word))
+    return ' '.join(stems)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE blog_post_search '
+        'USING fts5(title, text, category, location, tokenize="unicode61")'
+    )
+    Post = apps.get_model('blog', 'Post')
+    rows = [
+        (
+            post.pk,
+            stem_text(post.title),
+            stem_text(post.text),
+            stem_text(post.category.title if post.category else ''),
+            stem_text(
+                post.location.name
+                if post.location and post.location.is_published else ''
+            ),
+        )
+        for post in Post.objects.select_related(
+            'category', 'location'
+        ).iterator()
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO blog_post_search '
+            '(rowid, title, text, category, location) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            rows
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE blog_post_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_stored_files'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
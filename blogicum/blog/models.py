@@ -1,10 +1,18 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .caching import prime_card_versions
+from .storage import post_image_storage
 
 
 User = get_user_model()
 
+EXCERPT_WORDS = 10
+
 
 class PublishedModel(models.Model):
     is_published = models.BooleanField(
@@ -52,6 +60,17 @@ class Category(PublishedModel):
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        category = super().from_db(db, field_names, values)
+        category._loaded_is_published = category.__dict__.get('is_published')
+        return category
+
+    def publication_changed(self):
+        return self.is_published != getattr(
+            self, '_loaded_is_published', None
+        )
+
     def __repr__(self):
         return (
             f'<Category: {self.pk=} '
@@ -93,14 +112,69 @@ class Post(PublishedModel):
     image = models.ImageField(
         'Фото',
         upload_to='post_images',
+        storage=post_image_storage,
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+    excerpt = models.TextField(
+        'Анонс',
+        blank=True,
+        editable=False,
+        help_text='Начало текста для карточки поста в ленте.'
+    )
+    image_variants = models.JSONField(
+        'Копии фото',
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Размеры фото и его уменьшенные копии для страниц.'
+    )
+    is_visible = models.BooleanField(
+        'Показывается в ленте',
+        default=False,
+        editable=False,
+        help_text=('Пост опубликован, его категория опубликована '
+                   'и время публикации наступило.')
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_visible=True),
+                name='post_feed_idx'
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=models.Q(is_visible=True),
+                name='post_category_feed_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True, is_visible=False),
+                name='post_scheduled_idx'
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        post._loaded_category_id = post.__dict__.get('category_id')
+        post._loaded_author_id = post.__dict__.get('author_id')
+        post._loaded_image = post.__dict__.get('image')
+        return post
 
     def __repr__(self):
         return (
@@ -116,6 +190,42 @@ class Post(PublishedModel):
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'post_id': self.pk})
 
+    def compute_visibility(self, now=None):
+        return (
+            self.is_published
+            and self.pub_date <= (now or timezone.now())
+            and self.category_id is not None
+            and self.category.is_published
+        )
+
+    @property
+    def card_version(self):
+        """Версия карточки поста для кеширования её фрагмента."""
+        if not hasattr(self, '_card_version'):
+            prime_card_versions([self])
+        return self._card_version
+
+    def make_excerpt(self):
+        return Truncator(self.text).words(EXCERPT_WORDS, truncate=' …')
+
+    def image_changed(self):
+        return self.image.name != getattr(self, '_loaded_image', None)
+
+    def save(self, *args, **kwargs):
+        # Анонс заполняет сигнал pre_save: он срабатывает и при loaddata.
+        self.is_visible = self.compute_visibility()
+        derived_fields = {'is_visible', 'excerpt'}
+        if self.image_changed():
+            # Копии нового фото сделает фоновая задача после сохранения.
+            self._obsolete_image = getattr(self, '_loaded_image', None)
+            self._obsolete_image_variants = self.image_variants
+            self.image_variants = {}
+            derived_fields.add('image_variants')
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *derived_fields}
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     text = models.TextField('Комментарий', max_length=250)
@@ -136,9 +246,119 @@ class Comment(models.Model):
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
         default_related_name = 'comments'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx'
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        comment = super().from_db(db, field_names, values)
+        comment._loaded_post_id = comment.__dict__.get('post_id')
+        return comment
 
     def __repr__(self):
         return f'<Comment: {self.pk=} {self.created_at=} {self.text=:.50}>'
 
     def __str__(self):
         return f'{self.text:.50}'
+
+
+class CategoryFeedEntry(models.Model):
+    """Строка материализованной ленты категории: только видимые посты."""
+
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        verbose_name='Категория'
+    )
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='category_feed_entry',
+        verbose_name='Публикация'
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+
+    class Meta:
+        verbose_name = 'запись ленты категории'
+        verbose_name_plural = 'Ленты категорий'
+        default_related_name = 'feed_entries'
+        indexes = (
+            models.Index(
+                fields=('category', '-pub_date', '-post'),
+                name='category_feed_idx'
+            ),
+        )
+
+    def __repr__(self):
+        return (
+            f'<CategoryFeedEntry: {self.category_id=} '
+            f'{self.post_id=} {self.pub_date=}>'
+        )
+
+
+class StoredFileManager(models.Manager):
+
+    def acquire(self, names):
+        """
+        Учесть новые ссылки на файлы. Строка файла создаётся, если её
+        нет, и запись в неё удерживает блокировку до конца транзакции.
+        """
+        names = [name for name in names if name]
+        if not names:
+            return
+        with transaction.atomic(savepoint=False):
+            self.bulk_create(
+                [self.model(name=name) for name in set(names)],
+                ignore_conflicts=True
+            )
+            for name in names:
+                self.filter(name=name).update(
+                    references=F('references') + 1
+                )
+
+    def release(self, names, storage=post_image_storage):
+        """
+        Снять ссылки на файлы. Файл, на который больше
+        никто не ссылается, удаляется из хранилища.
+        """
+        names = [name for name in names if name]
+        if not names:
+            return
+        with transaction.atomic(savepoint=False):
+            for name in names:
+                self.filter(name=name).update(
+                    references=F('references') - 1
+                )
+            # Файл удаляется в той же транзакции, только если строка
+            # с нулём ссылок действительно удалена: загрузка того же
+            # содержимого берёт ссылку раньше, чем проверяет файл.
+            for name in set(names):
+                deleted, _ = self.filter(
+                    name=name, references__lte=0
+                ).delete()
+                if deleted:
+                    storage.delete(name)
+
+
+class StoredFile(models.Model):
+    """Файл хранилища медиа и число ссылок на него из постов."""
+
+    name = models.CharField('Имя файла', max_length=255, unique=True)
+    references = models.IntegerField('Число ссылок', default=0)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    objects = StoredFileManager()
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+
+    def __repr__(self):
+        return f'<StoredFile: {self.name=} {self.references=}>'
+
+    def __str__(self):
+        return self.name
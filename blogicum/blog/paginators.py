@@ -0,0 +1,195 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Номерной постраничный вывод с кешированным числом записей.
+    Число записей хранится в кеше под ключом count_cache_key
+    (ключ меняется вместе с версией ленты) и считается не дальше
+    count_limit: для огромной ленты точное число не нужно,
+    хватает знания, что записей «больше, чем count_limit».
+    """
+
+    count_timeout = 60 * 60
+
+    def __init__(self, object_list, per_page, count_cache_key=None,
+                 count_limit=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_cache_key = count_cache_key
+        self.count_limit = count_limit
+
+    @cached_property
+    def _count_info(self):
+        info = (
+            cache.get(self.count_cache_key)
+            if self.count_cache_key else None
+        )
+        if info is None:
+            info = self._compute_count()
+            if self.count_cache_key:
+                cache.set(self.count_cache_key, info, self.count_timeout)
+        return info
+
+    def _compute_count(self):
+        if self.count_limit is None:
+            return self.object_list.count(), False
+        count = self.object_list.order_by()[:self.count_limit + 1].count()
+        return min(count, self.count_limit), count > self.count_limit
+
+    @property
+    def count(self):
+        return self._count_info[0]
+
+    @property
+    def count_is_approximate(self):
+        return self._count_info[1]
+
+
+class CursorPage(Sequence):
+    """Страница ленты, полученная по курсору."""
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Постраничный вывод по ключу сортировки (keyset pagination).
+    Вместо OFFSET страница выбирается условием «строго после
+    последней показанной записи», поэтому стоимость запроса
+    не зависит от глубины страницы, а COUNT(*) не нужен.
+    Курсор — непрозрачная строка с направлением и значениями ключа.
+    """
+
+    cursor_based = True
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    @property
+    def last_cursor(self):
+        """Курсор последней страницы: та же выборка в обратном порядке."""
+        return self.encode_cursor(backwards=True)
+
+    def encode_cursor(self, obj=None, backwards=False):
+        values = []
+        if obj is not None:
+            for name in self.fields:
+                value = getattr(obj, name)
+                if hasattr(value, 'isoformat'):
+                    value = value.isoformat()
+                values.append(value)
+        data = json.dumps([int(backwards), *values]).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            data = base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)
+            )
+            backwards, *values = json.loads(data)
+        except (binascii.Error, ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        if values and len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        try:
+            values = [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except ValidationError:
+            raise InvalidCursor(cursor)
+        return bool(backwards), values
+
+    def _field(self, name):
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def _ordering(self, backwards):
+        if not backwards:
+            return self.ordering
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        )
+
+    def _after(self, ordering, values):
+        """Условие «строго после позиции values» для данной сортировки."""
+        condition = Q()
+        for i, name in enumerate(ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{f'{name.lstrip("-")}__{lookup}': values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        return condition
+
+    def page(self, cursor=None):
+        backwards, values = (
+            self.decode_cursor(cursor) if cursor else (False, [])
+        )
+        ordering = self._ordering(backwards)
+        queryset = self.queryset.order_by(*ordering)
+        if values:
+            queryset = queryset.filter(self._after(ordering, values))
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        del object_list[self.per_page:]
+        if backwards:
+            object_list.reverse()
+            has_next, has_previous = bool(values), has_more
+        else:
+            has_next, has_previous = has_more, bool(values)
+        if not object_list:
+            return CursorPage(object_list, self)
+        return CursorPage(
+            object_list,
+            self,
+            next_cursor=(
+                self.encode_cursor(object_list[-1]) if has_next else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(object_list[0], backwards=True)
+                if has_previous else None
+            ),
+        )
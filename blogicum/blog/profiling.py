@@ -0,0 +1,310 @@
+import math
+import sys
+from collections import defaultdict, namedtuple
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.template.base import Node, Template, TokenType
+
+
+# Активные профили: блоки profile() бывают вложенными.
+_active = ContextVar('blog_profiles', default=())
+# Активные профили шаблонов, блоки profile_templates().
+_active_templates = ContextVar('blog_template_profiles', default=())
+
+# source — строка кода проекта, из которой пришёл запрос,
+# template — строка шаблона, при рендеринге которой он выполнен.
+Query = namedtuple('Query', 'sql duration source template')
+
+# Файлы обёрток вокруг запросов к базе: их строки не бывают источником.
+WRAPPER_FILES = {__file__}
+
+
+class Profile:
+    """
+    Стоимость одного запроса или блока кода: время целиком,
+    число и время SQL-запросов, время рендеринга шаблонов,
+    попадания и промахи кеша. Время запросов, сделанных
+    из шаблонов, входит и в время шаблонов.
+    """
+
+    def __init__(self, keep_queries=False):
+        self.keep_queries = keep_queries
+        self.queries = []
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.started = None
+        self._template_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper()."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.query_count += 1
+            self.sql_time += duration
+            if self.keep_queries:
+                self.queries.append(Query(
+                    sql, duration, source_origin(), template_origin()
+                ))
+
+
+def source_origin():
+    """«Файл:строка» ближайшего вызова из кода проекта."""
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and filename not in WRAPPER_FILES:
+            return f'{Path(filename).relative_to(base_dir)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return None
+
+
+def template_origin():
+    """«Шаблон:строка» узла, который сейчас рендерится, или None."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            if isinstance(node, Node) and node.token and node.origin:
+                return f'{node.origin.template_name}:{node.token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+def current_profile():
+    profiles = _active.get()
+    return profiles[-1] if profiles else None
+
+
+@contextmanager
+def profile(keep_queries=False):
+    """Собрать Profile для кода внутри блока."""
+    instrument_templates()
+    instrument_caches()
+    result = Profile(keep_queries)
+    token = _active.set(_active.get() + (result,))
+    start = result.started = perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(result.record_query)
+                )
+            yield result
+    finally:
+        result.total_time = perf_counter() - start
+        _active.reset(token)
+
+
+@contextmanager
+def request_profile(request):
+    """
+    Профиль HTTP-запроса, общий для всех middleware: первый блок
+    собирает его, вложенные получают тот же профиль без повторной
+    подмены обёрток. total_time обновляется при выходе из блока.
+    """
+    result = getattr(request, '_blog_profile', None)
+    if result is not None:
+        yield result
+        result.total_time = perf_counter() - result.started
+        return
+    with profile() as result:
+        request._blog_profile = result
+        yield result
+
+
+def instrument_templates():
+    """
+    Подменить Template.render, чтобы учитывать время рендеринга.
+    Вложенные шаблоны (include, extends) не считаются дважды.
+    Вне profile() обёртка лишь проверяет переменную контекста.
+    """
+    if getattr(Template.render, 'profiled', False):
+        return
+    render = Template.render
+
+    @wraps(render)
+    def profiled_render(self, context):
+        profiles = _active.get()
+        if not profiles:
+            return render(self, context)
+        for result in profiles:
+            result._template_depth += 1
+        start = perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            duration = perf_counter() - start
+            for result in profiles:
+                result._template_depth -= 1
+                if not result._template_depth:
+                    result.template_time += duration
+
+    profiled_render.profiled = True
+    Template.render = profiled_render
+
+
+class TemplateProfile:
+    """
+    Время рендеринга по шаблонам, include, тегам и фильтрам:
+    число вызовов и суммарное время. Вложенные вызовы с той же
+    меткой (for внутри for) не считаются дважды.
+    """
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.times = defaultdict(float)
+        self._depth = defaultdict(int)
+
+    def breakdown(self):
+        """Метки, число вызовов и время в секундах, дольше — выше."""
+        return sorted(
+            ((label, self.calls[label], self.times[label])
+             for label in self.calls),
+            key=lambda row: row[2], reverse=True,
+        )
+
+
+@contextmanager
+def profile_templates():
+    """Собрать TemplateProfile для шаблонов, рендерящихся внутри блока."""
+    instrument_nodes()
+    result = TemplateProfile()
+    token = _active_templates.set(_active_templates.get() + (result,))
+    try:
+        yield result
+    finally:
+        _active_templates.reset(token)
+
+
+def template_label(template):
+    return template.origin.template_name or template.origin.name
+
+
+def node_label(node):
+    """
+    Метка узла: {% include "имя" %}, {% block имя %}, {% тег %}
+    или {{ …|фильтры }}.
+    У переменных без фильтров общая метка {{ … }}.
+    """
+    token = node.token
+    if token is None:
+        return None
+    if token.token_type == TokenType.VAR:
+        filters = [
+            bit.split(':', 1)[0].strip()
+            for bit in token.contents.split('|')[1:]
+        ]
+        return '{{ …%s }}' % ''.join(f'|{name}' for name in filters)
+    if token.token_type != TokenType.BLOCK:
+        return None
+    bits = token.split_contents()
+    if bits[0] in ('block', 'include', 'extends') and len(bits) > 1:
+        return f'{{% {bits[0]} {bits[1]} %}}'
+    return f'{{% {bits[0]} %}}'
+
+
+def _timed(function, label_of):
+    """Обёртка function, которая считает время в активных TemplateProfile."""
+
+    @wraps(function)
+    def timed(self, context):
+        profiles = _active_templates.get()
+        if not profiles:
+            return function(self, context)
+        label = label_of(self)
+        if label is None:
+            return function(self, context)
+        for result in profiles:
+            result.calls[label] += 1
+            result._depth[label] += 1
+        start = perf_counter()
+        try:
+            return function(self, context)
+        finally:
+            duration = perf_counter() - start
+            for result in profiles:
+                result._depth[label] -= 1
+                if not result._depth[label]:
+                    result.times[label] += duration
+
+    timed.profiled = True
+    return timed
+
+
+def instrument_nodes():
+    """
+    Подменить Node.render_annotated и Template._render. Текстовые узлы
+    Django рендерит своим render_annotated, их подмена не затрагивает.
+    Вне profile_templates() обёртки лишь проверяют переменную контекста.
+    """
+    if getattr(Node.render_annotated, 'profiled', False):
+        return
+    Node.render_annotated = _timed(Node.render_annotated, node_label)
+    Template._render = _timed(Template._render, template_label)
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу: доля share значений не больше него."""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[max(math.ceil(len(values) * share) - 1, 0)]
+
+
+_MISSING = object()
+
+
+def _count_cache(hits, misses):
+    for result in _active.get():
+        result.cache_hits += hits
+        result.cache_misses += misses
+
+
+def instrument_caches():
+    """
+    Подменить get() и get_many() у классов всех настроенных кешей.
+    get_many() из BaseCache читает ключи через get() и уже учтён им,
+    поэтому подменяется только там, где бэкенд его переопределяет.
+    """
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        if getattr(backend.get, 'profiled', False):
+            continue
+        get, get_many = backend.get, backend.get_many
+
+        @wraps(get)
+        def profiled_get(self, key, default=None, version=None, get=get):
+            value = get(self, key, _MISSING, version=version)
+            if value is _MISSING:
+                _count_cache(0, 1)
+                return default
+            _count_cache(1, 0)
+            return value
+
+        @wraps(get_many)
+        def profiled_get_many(self, keys, version=None, get_many=get_many):
+            keys = list(keys)
+            found = get_many(self, keys, version=version)
+            _count_cache(len(found), len(keys) - len(found))
+            return found
+
+        profiled_get.profiled = True
+        backend.get = profiled_get
+        if get_many is not BaseCache.get_many:
+            backend.get_many = profiled_get_many
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Post
+
+
+# Отправляется, когда отложенные посты появились в ленте;
+# posts — список словарей с id, author_id, category_id, location_id.
+posts_published = Signal()
+
+NEXT_PUBLICATION_KEY = 'blog:next_publication'
+NO_PUBLICATION = 'none'
+
+
+def scheduled_posts():
+    return Post.objects.filter(
+        is_published=True,
+        is_visible=False,
+        category__is_published=True
+    )
+
+
+def next_publication(now=None):
+    """Время ближайшей отложенной публикации или None."""
+    return scheduled_posts().filter(
+        pub_date__gt=now or timezone.now()
+    ).order_by('pub_date').values_list('pub_date', flat=True).first()
+
+
+def reset_schedule():
+    """Забыть запомненное время: оно будет вычислено заново."""
+    cache.delete(NEXT_PUBLICATION_KEY)
+
+
+def publish_due_posts(now=None):
+    """
+    Показать в ленте посты, время публикации которых наступило,
+    и запомнить время следующей публикации.
+    Возвращает список опубликованных постов в виде словарей.
+    """
+    now = now or timezone.now()
+    due = list(
+        scheduled_posts().filter(pub_date__lte=now).values(
+            'id', 'author_id', 'category_id', 'location_id'
+        )
+    )
+    if due:
+        Post.objects.filter(pk__in=[post['id'] for post in due]).update(
+            is_visible=True
+        )
+        posts_published.send(sender=Post, posts=due)
+    upcoming = next_publication(now)
+    cache.set(
+        NEXT_PUBLICATION_KEY,
+        upcoming.timestamp() if upcoming else NO_PUBLICATION,
+        None
+    )
+    return due
+
+
+def publish_if_due(now=None):
+    """
+    Опубликовать отложенные посты, если пришло их время.
+    Время ближайшей публикации хранится в кеше, поэтому обычно
+    проверка стоит одного обращения к кешу без запросов к базе.
+    """
+    now = now or timezone.now()
+    upcoming = cache.get(NEXT_PUBLICATION_KEY)
+    if upcoming == NO_PUBLICATION:
+        return []
+    if upcoming is not None and upcoming > now.timestamp():
+        return []
+    return publish_due_posts(now)
@@ -0,0 +1,222 @@
+import re
+
+import snowballstemmer
+from django.core.paginator import InvalidPage
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .paginators import CursorPage
+
+
+TABLE = 'blog_post_search'
+COLUMNS = ('title', 'text', 'category', 'location')
+# Веса столбцов для bm25(): совпадение в заголовке важнее, чем в тексте.
+WEIGHTS = (10.0, 1.0, 3.0, 3.0)
+SNIPPET_WORDS = 30
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'[а-яё]')
+
+_stemmers = {
+    'russian': snowballstemmer.stemmer('russian'),
+    'english': snowballstemmer.stemmer('english'),
+}
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def stem(word):
+    word = word.lower()
+    language = 'russian' if CYRILLIC.search(word) else 'english'
+    return _stemmers[language].stemWord(word)
+
+
+def stem_text(text):
+    """
+    Текст для индекса: основы слов через пробел. Так «публикации»
+    и «публикацию» в индексе и в запросе становятся одним словом.
+    """
+    return ' '.join(stem(word) for word in WORD.findall(text or ''))
+
+
+def query_stems(query):
+    return [stem(word) for word in WORD.findall(query)]
+
+
+def match_expression(stems):
+    """Все слова запроса, каждое — как начало слова в индексе."""
+    return ' '.join(f'"{word}"*' for word in stems)
+
+
+def _rows(posts):
+    for post in posts:
+        location = post.location
+        yield (
+            post.pk,
+            stem_text(post.title),
+            stem_text(post.text),
+            stem_text(post.category.title if post.category else ''),
+            stem_text(
+                location.name if location and location.is_published else ''
+            ),
+        )
+
+
+def index_posts(posts):
+    """Добавить посты в индекс или обновить их строки."""
+    if not is_supported():
+        return
+    rows = list(_rows(posts))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, {", ".join(COLUMNS)}) '
+            f'VALUES (%s, %s, %s, %s, %s)',
+            rows
+        )
+
+
+def remove_posts(post_ids):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [(post_id,) for post_id in post_ids]
+        )
+
+
+def rebuild(posts, batch_size=1000):
+    """Перестроить индекс по всем постам queryset."""
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    indexed = 0
+    batch = []
+    for post in posts.select_related('category', 'location').iterator(
+        chunk_size=batch_size
+    ):
+        batch.append(post)
+        if len(batch) == batch_size:
+            index_posts(batch)
+            indexed += len(batch)
+            batch = []
+    index_posts(batch)
+    return indexed + len(batch)
+
+
+class SearchPage(CursorPage):
+    """Страница результатов поиска по номеру."""
+
+    def __init__(self, object_list, paginator, number, has_next):
+        super().__init__(object_list, paginator)
+        self.number = number
+        self._has_next = has_next
+
+    def __repr__(self):
+        return f'<Search page {self.number}>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class SearchPaginator:
+    """
+    Результаты поиска по релевантности, страницы по номеру.
+    Ранг bm25() зависит от статистики всего индекса и меняется
+    с каждым сохранённым постом, поэтому курсор по рангу мог бы
+    пропускать или повторять результаты между страницами.
+    """
+
+    cursor_based = False
+
+    def __init__(self, query, per_page):
+        self.stems = query_stems(query)
+        self.per_page = per_page
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise InvalidPage(number)
+        if number < 1:
+            raise InvalidPage(number)
+        return number
+
+    def ranked_ids(self, offset=0):
+        """Id видимых постов, лучшие — первыми."""
+        if not self.stems or not is_supported():
+            return []
+        weights = ', '.join(map(str, WEIGHTS))
+        sql = (
+            f'SELECT {TABLE}.rowid FROM {TABLE} '
+            f'JOIN blog_post ON blog_post.id = {TABLE}.rowid '
+            f'WHERE {TABLE} MATCH %s AND blog_post.is_visible '
+            f'ORDER BY bm25({TABLE}, {weights}), {TABLE}.rowid '
+            f'LIMIT %s OFFSET %s'
+        )
+        params = [match_expression(self.stems), self.per_page + 1, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [post_id for post_id, in cursor.fetchall()]
+
+    def page(self, posts, number=1):
+        """
+        Страница результатов: посты из queryset posts
+        в порядке релевантности, у каждого — snippet.
+        """
+        number = self.validate_number(number)
+        ids = self.ranked_ids((number - 1) * self.per_page)
+        has_next = len(ids) > self.per_page
+        del ids[self.per_page:]
+        found = posts.in_bulk(ids)
+        object_list = []
+        for post_id in ids:
+            if post_id in found:
+                post = found[post_id]
+                post.snippet = make_snippet(post.text, self.stems)
+                object_list.append(post)
+        return SearchPage(object_list, self, number, has_next)
+
+
+def make_snippet(text, stems, words=SNIPPET_WORDS):
+    """
+    Отрывок текста вокруг первого найденного слова,
+    найденные слова выделены <mark>.
+    """
+    tokens = list(WORD.finditer(text))
+    matches = {
+        i for i, token in enumerate(tokens)
+        if any(stem(token.group()).startswith(word) for word in stems)
+    }
+    start = max(min(matches, default=0) - words // 3, 0)
+    window = tokens[start:start + words]
+    if not window:
+        return ''
+    begin, end = window[0].start(), window[-1].end()
+    parts = ['… ' if begin > 0 else '']
+    position = begin
+    for i, token in enumerate(window, start):
+        parts.append(escape(text[position:token.start()]))
+        if i in matches:
+            parts.append(f'<mark>{escape(token.group())}</mark>')
+        else:
+            parts.append(escape(token.group()))
+        position = token.end()
+    parts.append(' …' if end < len(text) else '')
+    return mark_safe(''.join(parts))
@@ -0,0 +1,270 @@
+import multiprocessing
+import random
+from collections import namedtuple
+from datetime import timedelta
+
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from .dumps import keep_timestamps, reset_sequences
+from .models import Category, Comment, Location, Post, User
+
+
+LOCALE = 'ru_RU'
+PASSWORD = 'seed-password'
+CHUNK_SIZE = 1000
+# Доли постов: снятые с публикации, отложенные, без места.
+UNPUBLISHED_SHARE = 0.03
+SCHEDULED_SHARE = 0.02
+NO_LOCATION_SHARE = 0.3
+SCHEDULE_DAYS = 30
+# Доля скрытых категорий и мест.
+HIDDEN_SHARE = 0.1
+# Чем больше, тем сильнее посты и комментарии сосредоточены
+# у первых авторов и категорий: как в жизни, активных мало.
+SKEW = 2
+
+Plan = namedtuple('Plan', (
+    'seed now days posts chunk_size comments_per_post '
+    'first_user_id users categories location_ids first_post_id'
+))
+
+_plan = None
+
+
+def skewed(rng, items):
+    """Случайный элемент, первые выпадают чаще последних."""
+    return items[int(len(items) * rng.random() ** SKEW)]
+
+
+def make_faker(rng):
+    fake = Faker(LOCALE)
+    fake.seed_instance(rng.getrandbits(64))
+    return fake
+
+
+def next_id(model):
+    return (model._base_manager.aggregate(Max('pk'))['pk__max'] or 0) + 1
+
+
+def init_worker(plan):
+    global _plan
+    if not apps.ready:
+        django.setup()
+    _plan = plan
+
+
+def generate_chunk(chunk):
+    """
+    Посты пачки номер chunk и комментарии к ним в виде словарей.
+    Генератор случайных чисел зависит только от зерна и номера
+    пачки, поэтому результат не зависит от числа процессов.
+    """
+    plan = _plan
+    rng = random.Random(f'{plan.seed}:posts:{chunk}')
+    fake = make_faker(rng)
+    users = range(plan.first_user_id, plan.first_user_id + plan.users)
+    first = chunk * plan.chunk_size
+    posts, comments = [], []
+    for number in range(first, min(first + plan.chunk_size, plan.posts)):
+        if rng.random() < SCHEDULED_SHARE:
+            pub_date = plan.now + timedelta(
+                days=rng.uniform(0, SCHEDULE_DAYS)
+            )
+            created_at = plan.now - timedelta(days=rng.random())
+        else:
+            # Свежих постов больше, чем старых.
+            pub_date = plan.now - timedelta(
+                days=plan.days * rng.betavariate(1, 2)
+            )
+            created_at = pub_date
+        category_id, category_published = skewed(rng, plan.categories)
+        post = {
+            'id': plan.first_post_id + number,
+            'title': fake.sentence(nb_words=rng.randint(2, 6)).rstrip('.'),
+            'text': '\n\n'.join(fake.paragraphs(nb=rng.randint(1, 5))),
+            'pub_date': pub_date,
+            'created_at': created_at,
+            'is_published': rng.random() >= UNPUBLISHED_SHARE,
+            'author_id': skewed(rng, users),
+            'category_id': category_id,
+            'location_id': (
+                None if rng.random() < NO_LOCATION_SHARE
+                else rng.choice(plan.location_ids)
+            ),
+        }
+        post['excerpt'] = Post(text=post['text']).make_excerpt()
+        post['is_visible'] = (
+            post['is_published'] and pub_date <= plan.now
+            and category_published
+        )
+        count = 0
+        if post['is_visible'] and plan.comments_per_post:
+            count = round(rng.expovariate(1 / plan.comments_per_post))
+        post['comment_count'] = count
+        posts.append(post)
+        for delay in sorted(rng.random() for _ in range(count)):
+            comments.append({
+                'post_id': post['id'],
+                'author_id': skewed(rng, users),
+                'text': fake.sentence(nb_words=rng.randint(3, 25))[:250],
+                'created_at': pub_date + (plan.now - pub_date) * delay,
+            })
+    return posts, comments
+
+
+class Seeder:
+    """
+    Синтетическая база для нагрузочных тестов. Тексты генерируют
+    процессы пула, а пишет в базу только главный процесс —
+    пачками bulk_create с явными id. Одинаковое зерно на пустой
+    базе даёт одинаковые данные (даты — относительно начала дня).
+    """
+
+    def __init__(self, seed=0, users=100, categories=10, locations=50,
+                 posts=1000, comments_per_post=5, days=3 * 365,
+                 processes=None, batch_size=1000, log=print):
+        self.seed = seed
+        self.users = users
+        self.categories = categories
+        self.locations = locations
+        self.posts = posts
+        self.comments_per_post = comments_per_post
+        self.days = days
+        self.processes = processes
+        self.batch_size = batch_size
+        self.log = log
+        self.now = timezone.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    def rng(self, name):
+        return random.Random(f'{self.seed}:{name}')
+
+    def create_users(self):
+        rng = self.rng('users')
+        fake = make_faker(rng)
+        password = make_password(PASSWORD)
+        first_id = next_id(User)
+        for start in range(0, self.users, self.batch_size):
+            stop = min(start + self.batch_size, self.users)
+            User.objects.bulk_create([
+                User(
+                    id=first_id + number,
+                    username=f'{fake.user_name()}{first_id + number}',
+                    first_name=fake.first_name(),
+                    last_name=fake.last_name(),
+                    email=fake.email(),
+                    password=password,
+                    date_joined=self.now - timedelta(
+                        days=self.days * rng.random()
+                    ),
+                )
+                for number in range(start, stop)
+            ])
+        return first_id
+
+    def create_categories(self):
+        rng = self.rng('categories')
+        fake = make_faker(rng)
+        first_id = next_id(Category)
+        categories = [
+            Category(
+                id=first_id + number,
+                title=fake.sentence(nb_words=2).rstrip('.'),
+                description=fake.paragraph(),
+                slug=f'category-{first_id + number}',
+                is_published=rng.random() >= HIDDEN_SHARE,
+            )
+            for number in range(self.categories)
+        ]
+        Category.objects.bulk_create(categories)
+        return [
+            (category.id, category.is_published) for category in categories
+        ]
+
+    def create_locations(self):
+        rng = self.rng('locations')
+        fake = make_faker(rng)
+        first_id = next_id(Location)
+        Location.objects.bulk_create([
+            Location(
+                id=first_id + number,
+                name=fake.city_name(),
+                is_published=rng.random() >= HIDDEN_SHARE,
+            )
+            for number in range(self.locations)
+        ])
+        return list(range(first_id, first_id + self.locations))
+
+    def plan(self):
+        with transaction.atomic():
+            first_user_id = self.create_users()
+            categories = self.create_categories()
+            location_ids = self.create_locations()
+        return Plan(
+            seed=self.seed,
+            now=self.now,
+            days=self.days,
+            posts=self.posts,
+            chunk_size=CHUNK_SIZE,
+            comments_per_post=self.comments_per_post,
+            first_user_id=first_user_id,
+            users=self.users,
+            categories=categories,
+            location_ids=location_ids,
+            first_post_id=next_id(Post),
+        )
+
+    def chunks(self, plan):
+        chunks = range(-(-self.posts // CHUNK_SIZE))
+        if self.processes == 0:
+            init_worker(plan)
+            yield from map(generate_chunk, chunks)
+            return
+        # Открытые соединения с базой нельзя делить между процессами.
+        connections.close_all()
+        with multiprocessing.Pool(
+            self.processes, initializer=init_worker, initargs=(plan,)
+        ) as pool:
+            yield from pool.imap(generate_chunk, chunks)
+
+    def run(self):
+        if not (self.users and self.categories and self.locations):
+            raise ValueError(
+                'Нужен хотя бы один пользователь, категория и место.'
+            )
+        plan = self.plan()
+        self.log(
+            f'Пользователей: {self.users}, категорий: {self.categories}, '
+            f'мест: {self.locations}'
+        )
+        comment_id = next_id(Comment)
+        created_posts = created_comments = 0
+        for posts, comments in self.chunks(plan):
+            for number, comment in enumerate(comments, comment_id):
+                comment['id'] = number
+            comment_id += len(comments)
+            with transaction.atomic(), keep_timestamps(Post), \
+                    keep_timestamps(Comment):
+                Post.objects.bulk_create(
+                    [Post(**post) for post in posts],
+                    batch_size=self.batch_size
+                )
+                Comment.objects.bulk_create(
+                    [Comment(**comment) for comment in comments],
+                    batch_size=self.batch_size
+                )
+            created_posts += len(posts)
+            created_comments += len(comments)
+            self.log(
+                f'Постов: {created_posts}/{self.posts}, '
+                f'комментариев: {created_comments}'
+            )
+        reset_sequences([User, Category, Location, Post, Comment])
+        return created_posts, created_comments
@@ -0,0 +1,225 @@
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    category_feed, images, metrics, search, slow_queries, tasks
+)
+from .caching import bump_versions, feed_tags
+from .models import Category, Comment, Location, Post, StoredFile, User
+from .scheduling import posts_published, reset_schedule
+
+
+# Пауза перед прогревом кеша: правки, идущие подряд, прогреваются один раз.
+WARM_DELAY = 5
+
+
+def _change_comment_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta
+    )
+    _bump_posts_versions(Post.objects.filter(pk=post_id))
+
+
+def _bump_posts_versions(posts):
+    """Повысить версии лент и страниц, где показаны эти посты."""
+    bump_versions(*(
+        tag
+        for post_id, category_id, author_id in posts.values_list(
+            'pk', 'category_id', 'author_id'
+        )
+        for tag in feed_tags(post_id, category_id, author_id)
+    ))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    """Учесть новый, изменённый или перенесённый комментарий."""
+    if raw:
+        return
+    loaded_post_id = getattr(instance, '_loaded_post_id', None)
+    if created:
+        metrics.COMMENTS_CREATED.inc()
+        _change_comment_count(instance.post_id, 1)
+        _warm_post_pages(instance.post_id)
+    elif loaded_post_id is not None and loaded_post_id != instance.post_id:
+        _change_comment_count(loaded_post_id, -1)
+        _change_comment_count(instance.post_id, 1)
+    else:
+        bump_versions(f'post:{instance.post_id}')
+    instance._loaded_post_id = instance.post_id
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    _change_comment_count(instance.post_id, -1)
+
+
+def _bump_post_versions(post):
+    bump_versions(
+        *feed_tags(post.pk, post.category_id, post.author_id),
+        *feed_tags(
+            category_id=getattr(post, '_loaded_category_id', None),
+            author_id=getattr(post, '_loaded_author_id', None)
+        )
+    )
+    post._loaded_category_id = post.category_id
+    post._loaded_author_id = post.author_id
+
+
+def _bump_category_versions(category):
+    author_ids = Post.objects.filter(category=category).values_list(
+        'author_id', flat=True
+    ).distinct()
+    bump_versions(
+        *feed_tags(category_id=category.pk),
+        *(f'author:{author_id}' for author_id in author_ids)
+    )
+
+
+def _warm_post_pages(post_id, category_slug=None):
+    paths = [
+        reverse('blog:post_detail', args=[post_id]),
+        reverse('blog:index'),
+    ]
+    if category_slug:
+        paths.append(reverse('blog:category_posts', args=[category_slug]))
+    tasks.warm_page_cache.delay(
+        key=f'warm_page_cache:{post_id}', countdown=WARM_DELAY, paths=paths
+    )
+
+
+def _update_image_variants(post):
+    if '_obsolete_image' in post.__dict__:
+        # Ссылку на новое фото взяло хранилище при его сохранении.
+        StoredFile.objects.release([post.__dict__.pop('_obsolete_image')])
+    obsolete = post.__dict__.pop('_obsolete_image_variants', None)
+    post._loaded_image = post.image.name
+    if obsolete or (obsolete is not None and post.image):
+        tasks.make_image_variants.delay(
+            post_id=post.pk, image=post.image.name, obsolete=obsolete
+        )
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    """Анонс для карточек, в том числе у постов из фикстур."""
+    instance.excerpt = instance.make_excerpt()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Отложенный пост мог стать ближайшей публикацией."""
+    if created and not raw:
+        metrics.POSTS_CREATED.inc()
+    _bump_post_versions(instance)
+    _update_image_variants(instance)
+    category_feed.sync_post(instance)
+    if not instance.is_visible:
+        reset_schedule()
+    if raw:
+        # Связанные объекты из фикстуры могут быть ещё не загружены;
+        # индекс перестраивается командой rebuild_search_index.
+        return
+    search.index_posts([instance])
+    if instance.is_visible:
+        _warm_post_pages(instance.pk, instance.category.slug)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    _bump_post_versions(instance)
+    search.remove_posts([instance.pk])
+    StoredFile.objects.release([
+        instance.image.name, *images.variant_names(instance.image_variants)
+    ])
+
+
+@receiver(posts_published)
+def scheduled_posts_published(sender, posts, **kwargs):
+    category_feed.add_posts([post['id'] for post in posts])
+    bump_versions(*(
+        tag for post in posts for tag in feed_tags(
+            post['id'], post['category_id'], post['author_id']
+        )
+    ))
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, raw=False, **kwargs):
+    """
+    Пересчитать видимость постов категории и её ленту, если
+    категорию опубликовали или сняли с публикации.
+    """
+    if raw:
+        return
+    if instance.publication_changed():
+        posts = Post.objects.filter(category=instance)
+        if instance.is_published:
+            posts.filter(
+                is_visible=False, is_published=True,
+                pub_date__lte=timezone.now()
+            ).update(is_visible=True)
+        else:
+            posts.filter(is_visible=True).update(is_visible=False)
+        category_feed.sync_category(instance)
+        instance._loaded_is_published = instance.is_published
+    _bump_category_versions(instance)
+    reset_schedule()
+    tasks.update_search_index.delay(
+        key=f'update_search_index:category:{instance.pk}',
+        category_id=instance.pk
+    )
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    """Посты удалённой категории остаются без категории и скрываются."""
+    Post.objects.filter(category=instance, is_visible=True).update(
+        is_visible=False
+    )
+    _bump_category_versions(instance)
+    tasks.update_search_index.delay(post_ids=list(
+        Post.objects.filter(category=instance).values_list('pk', flat=True)
+    ))
+
+
+@receiver(post_save, sender=Location)
+def location_saved(sender, instance, **kwargs):
+    bump_versions(f'location:{instance.pk}')
+    _bump_posts_versions(Post.objects.filter(location=instance))
+    tasks.update_search_index.delay(
+        key=f'update_search_index:location:{instance.pk}',
+        location_id=instance.pk
+    )
+
+
+@receiver(pre_delete, sender=Location)
+def location_deleted(sender, instance, **kwargs):
+    bump_versions(f'location:{instance.pk}')
+    posts = Post.objects.filter(location=instance)
+    _bump_posts_versions(posts)
+    tasks.update_search_index.delay(
+        post_ids=list(posts.values_list('pk', flat=True))
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    """Имя пользователя показано в его постах и комментариях."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_versions(f'user:{instance.pk}')
+    _bump_posts_versions(Post.objects.filter(author=instance))
+    _bump_posts_versions(Post.objects.filter(comments__author=instance))
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    """Замерять запросы каждого соединения для лога медленных запросов."""
+    slow_queries.install(connection)
@@ -0,0 +1,178 @@
+import json
+import logging
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import sha1
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .profiling import WRAPPER_FILES, source_origin, template_origin
+
+
+logger = logging.getLogger('blog.slow_queries')
+
+WRAPPER_FILES.add(__file__)
+
+# Запрос, который сейчас обрабатывается: из него берутся адрес и view.
+_request = ContextVar('blog_slow_query_request', default=None)
+# Отпечатки запросов, план которых этот процесс уже записал.
+_explained = set()
+
+# Литералы и наборы параметров заменяются знаком ?, чтобы запросы,
+# различающиеся лишь значениями, получали один отпечаток.
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+EXPLAINABLE = re.compile(r'\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b', re.I)
+
+Offender = namedtuple(
+    'Offender',
+    'fingerprint sql count total_ms max_ms views templates plan last_seen',
+)
+
+
+def normalize(sql):
+    """Форма запроса без значений."""
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(sql):
+    return sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+@contextmanager
+def handling(request):
+    """Связать запросы к базе внутри блока с HTTP-запросом request."""
+    token = _request.set(request)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """
+    Обёртка для connection.execute_wrappers: запросы дольше
+    BLOG_SLOW_QUERY_MS пишутся в лог blog.slow_queries.
+    """
+    threshold = getattr(settings, 'BLOG_SLOW_QUERY_MS', None)
+    if threshold is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (perf_counter() - start) * 1000
+    if duration >= threshold:
+        record(context['connection'], sql, params, many, duration)
+    return result
+
+
+def install(connection):
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
+
+
+def record(connection, sql, params, many, duration):
+    key = fingerprint(sql)
+    plan = None
+    if key not in _explained and not many and EXPLAINABLE.match(sql):
+        _explained.add(key)
+        plan = explain(connection, sql, params)
+    request = _request.get()
+    match = request.resolver_match if request is not None else None
+    logger.warning(json.dumps({
+        'time': timezone.now().isoformat(),
+        'fingerprint': key,
+        'duration_ms': round(duration, 2),
+        'database': connection.alias,
+        'sql': sql,
+        'path': request.path if request is not None else None,
+        'view': match.view_name if match else None,
+        'template': template_origin(),
+        'source': source_origin(),
+        'plan': plan,
+    }, ensure_ascii=False))
+
+
+def explain(connection, sql, params):
+    """
+    План запроса. Курсор базы берётся в обход обёрток Django,
+    чтобы EXPLAIN не попадал ни в этот лог, ни в счётчики запросов.
+    """
+    prefix = (
+        'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.cursor.execute(prefix + sql, params)
+            return [str(row[-1]) for row in cursor.cursor.fetchall()]
+    except DatabaseError as error:
+        return [f'План не получен: {error}']
+
+
+def log_files():
+    """Файл лога и его архивные копии от RotatingFileHandler."""
+    path = Path(settings.BLOG_SLOW_QUERY_LOG)
+    backups = sorted(path.parent.glob(f'{path.name}.*'))
+    return [file for file in (path, *backups) if file.is_file()]
+
+
+def read_log():
+    for path in log_files():
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def worst_offenders(records, limit=50):
+    """Формы запросов, на которые ушло больше всего времени."""
+    offenders = {}
+    for entry in records:
+        key = entry['fingerprint']
+        offender = offenders.setdefault(key, {
+            'fingerprint': key,
+            'sql': normalize(entry['sql']),
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'views': set(),
+            'templates': set(),
+            'plan': None,
+            'last_seen': entry['time'],
+        })
+        offender['count'] += 1
+        offender['total_ms'] += entry['duration_ms']
+        offender['max_ms'] = max(offender['max_ms'], entry['duration_ms'])
+        offender['last_seen'] = max(offender['last_seen'], entry['time'])
+        if entry.get('view'):
+            offender['views'].add(entry['view'])
+        if entry.get('template'):
+            offender['templates'].add(entry['template'])
+        if entry.get('plan'):
+            offender['plan'] = entry['plan']
+    ranked = sorted(
+        offenders.values(), key=lambda item: item['total_ms'], reverse=True
+    )
+    return [
+        Offender(**{
+            **item,
+            'total_ms': round(item['total_ms'], 2),
+            'views': sorted(item['views']),
+            'templates': sorted(item['templates']),
+        })
+        for item in ranked[:limit]
+    ]
@@ -0,0 +1,65 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файлы называются по SHA-256 содержимого и раскладываются
+    по вложенным каталогам из первых знаков хеша:
+    post_images/3f/a2/3fa2….jpg. В одном каталоге остаётся немного
+    файлов, а одинаковые загрузки хранятся одним файлом.
+    Сохранение берёт ссылку на файл, а когда его можно удалить,
+    решает учёт ссылок StoredFile.
+    """
+
+    shard_depth = 2
+    shard_width = 2
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content_hash = digest.hexdigest()
+        return posixpath.join(
+            posixpath.dirname(name),
+            *(
+                content_hash[i:i + self.shard_width]
+                for i in range(
+                    0, self.shard_depth * self.shard_width, self.shard_width
+                )
+            ),
+            content_hash + posixpath.splitext(name)[1].lower()
+        )
+
+    def is_content_name(self, name):
+        shards = '/'.join(
+            [f'[0-9a-f]{{{self.shard_width}}}'] * self.shard_depth
+        )
+        return re.search(rf'(^|/){shards}/[0-9a-f]{{64}}(\.\w+)?$', name)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        # Ссылка на файл берётся до проверки, что он уже есть: пока
+        # транзакция не завершена, StoredFileManager.release() не удалит
+        # этот файл, а после неё увидит новую ссылку.
+        from .models import StoredFile
+
+        with transaction.atomic():
+            StoredFile.objects.acquire([name])
+            if self.exists(name):
+                return name
+            return super().save(name, content, max_length)
+
+
+post_image_storage = ContentAddressedStorage()
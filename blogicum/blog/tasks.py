@@ -0,0 +1,67 @@
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpRequest
+from django.urls import resolve
+
+from jobs.queue import task
+
+from . import images, search
+from .caching import bump_versions, feed_tags
+from .models import Post, StoredFile
+
+
+@task(max_attempts=3)
+def make_image_variants(post_id, image, obsolete=None):
+    """
+    Удалить копии прежнего фото и сделать копии нового.
+    Если фото успели снова заменить, задача ничего не делает:
+    копии сделает задача, поставленная при замене.
+    """
+    StoredFile.objects.release(images.variant_names(obsolete or {}))
+    post = Post.objects.filter(pk=post_id, image=image).only(
+        'image', 'category_id', 'author_id'
+    ).first()
+    if post is None or not image:
+        return
+    # Ссылки на копии берёт хранилище при их сохранении.
+    variants = images.make_variants(post.image)
+    names = images.variant_names(variants)
+    if not Post.objects.filter(pk=post_id, image=image).update(
+        image_variants=variants
+    ):
+        StoredFile.objects.release(names)
+        return
+    bump_versions(*feed_tags(post.pk, post.category_id, post.author_id))
+
+
+@task(max_attempts=1)
+def warm_page_cache(paths):
+    """
+    Отрендерить страницы как гость, чтобы они попали в кеш страниц
+    до прихода читателей. View вызывается напрямую, минуя middleware:
+    прогрев не считается посещением в метриках и логах запросов.
+    """
+    for path in paths:
+        request = HttpRequest()
+        request.method = 'GET'
+        request.path = request.path_info = path
+        request.user = AnonymousUser()
+        request.resolver_match = match = resolve(path)
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+        except Http404:
+            continue
+        if hasattr(response, 'render'):
+            response.render()
+
+
+@task(max_attempts=3)
+def update_search_index(post_ids=None, category_id=None, location_id=None):
+    """Переиндексировать посты после правки их категории или места."""
+    posts = Post.objects.select_related('category', 'location')
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    if category_id is not None:
+        posts = posts.filter(category_id=category_id)
+    if location_id is not None:
+        posts = posts.filter(location_id=location_id)
+    search.index_posts(posts.iterator())
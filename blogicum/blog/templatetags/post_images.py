@@ -0,0 +1,43 @@
+from django import template
+
+from blog.images import VARIANT_WIDTHS
+
+register = template.Library()
+
+
+def _srcset(storage, variants):
+    return ', '.join(
+        f'{storage.url(variant["name"])} {variant["width"]}w'
+        for variant in variants
+    )
+
+
+@register.inclusion_tag('includes/post_picture.html')
+def post_picture(post, kind, loading='lazy'):
+    """
+    Фото поста для места показа kind ('card' или 'detail'):
+    WebP и запасной формат с набором ширин под плотность экрана.
+    Пока копий нет, показывается оригинал.
+    """
+    width = VARIANT_WIDTHS[kind]
+    variants = post.image_variants.get(kind)
+    context = {'post': post, 'loading': loading}
+    if not variants:
+        context['src'] = post.image.url
+        return context
+    by_format = {}
+    for variant in variants:
+        by_format.setdefault(variant['format'], []).append(variant)
+    webp = by_format.pop('webp', [])
+    fallback = next(iter(by_format.values()))
+    first = fallback[0]
+    storage = post.image.storage
+    context.update(
+        src=storage.url(first['name']),
+        srcset=_srcset(storage, fallback),
+        webp_srcset=_srcset(storage, webp),
+        sizes=f'(max-width: {width}px) 100vw, {width}px',
+        width=first['width'],
+        height=first['height'],
+    )
+    return context
@@ -13,6 +13,15 @@ urlpatterns = [
     path('posts/<int:post_id>/delete/',
          views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('posts/<int:post_id>/comments/',
+         views.CommentListView.as_view(),
+         name='comments'),
+    path('posts/<int:post_id>/comments/new/',
+         views.NewCommentListView.as_view(),
+         name='new_comments'),
+    path('posts/<int:post_id>/comments/stream/',
+         views.comment_stream,
+         name='comment_stream'),
     path('posts/<int:post_id>/comment/',
          views.CommentCreateView.as_view(),
          name='add_comment'),
@@ -25,6 +34,15 @@ urlpatterns = [
     path('posts/create/',
          views.PostCreateView.as_view(),
          name='create_post'),
+    path('search/',
+         views.SearchView.as_view(),
+         name='search'),
+    path('export/',
+         views.ExportView.as_view(),
+         name='export'),
+    path('metrics',
+         views.MetricsView.as_view(),
+         name='metrics'),
     path('category/<slug:category_slug>/',
          views.CategoryView.as_view(),
          name='category_posts'),
@@ -1,63 +1,181 @@
-from datetime import datetime
-
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.paginator import InvalidPage
+from django.db import transaction
+from django.db.models import F
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.crypto import constant_time_compare
 from django.views.generic import (
-    CreateView, DeleteView, DetailView, ListView, UpdateView
+    CreateView, DeleteView, DetailView, ListView, UpdateView, View
 )
 from django.urls import reverse, reverse_lazy
+from prometheus_client import CONTENT_TYPE_LATEST
 
-from .forms import PostForm, CommentForm
+from .forms import PostForm, CommentForm, ExportForm
 from .models import Category, Post, Comment, User
+from . import category_feed, dumps, events, metrics
+from .caching import (
+    AnonymousPageCacheMixin, make_key, prime_card_versions
+)
+from .paginators import CachedCountPaginator, CursorPaginator, InvalidCursor
+from .search import SearchPaginator
 
 
 PAGINATE_BY = 10
+COUNT_LIMIT = 10_000
+COMMENTS_PER_PAGE = 20
 
 
 def filter_published_posts(posts, use_filter=True):
     posts = posts.select_related(
         'location', 'category', 'author'
-    ).annotate(
-        comment_count=Count('comments')
-    ).order_by('-pub_date')
+    ).order_by('-pub_date', '-id')
     if use_filter:
-        posts = posts.filter(
-            is_published=True,
-            pub_date__lte=datetime.now(),
-            category__is_published=True
-        )
+        posts = posts.filter(is_visible=True)
     return posts
 
 
+class CachedObjectMixin:
+    """
+    Загружать объект страницы не больше одного раза за запрос.
+    Поиск объекта описывается в fetch_object(),
+    а get_object() возвращает запомненный результат.
+    """
+
+    def fetch_object(self, queryset=None):
+        return super().get_object(queryset)
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return self.fetch_object(queryset)
+        if not hasattr(self, '_object'):
+            self._object = self.fetch_object()
+        return self._object
+
+
 class PostsListMixin(ListView):
+    """
+    Лента постов с постраничным выводом.
+    Номерные страницы (?page=) оставлены для переходов по номеру,
+    а ссылки «вперёд/назад» ведут по курсору (?cursor=),
+    чтобы глубокие страницы стоили столько же, сколько первая.
+    Число постов в ленте кешируется по тегам из get_cache_tags().
+    Полный текст постов в ленте не нужен: карточки показывают анонс.
+    """
+
     model = Post
     paginate_by = PAGINATE_BY
+    paginator_class = CachedCountPaginator
+    cursor_kwarg = 'cursor'
+    cursor_ordering = ('-pub_date', '-id')
+
+    def get_cache_tags(self):
+        return ['feed']
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        return super().get_paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            count_cache_key=make_key(
+                'blog:feed_count', self.get_cache_tags(),
+                self.request.resolver_match.view_name,
+                self.get_queryset_variant()
+            ),
+            count_limit=COUNT_LIMIT,
+            **kwargs
+        )
+
+    def get_queryset_variant(self):
+        """Признак, отличающий разные выборки с одними тегами."""
+        return ''
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        prime_card_versions(context['page_obj'])
+        return context
+
+    def paginate_queryset(self, queryset, page_size):
+        queryset = queryset.defer('text')
+        cursor_paginator = CursorPaginator(
+            queryset, page_size, self.cursor_ordering
+        )
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        if cursor is None:
+            paginator, page, object_list, is_paginated = (
+                super().paginate_queryset(queryset, page_size)
+            )
+            if page.has_next():
+                page.next_cursor = cursor_paginator.encode_cursor(page[-1])
+            page.last_cursor = cursor_paginator.last_cursor
+            page.elided_page_range = list(
+                paginator.get_elided_page_range(page.number)
+            )
+            return paginator, page, object_list, is_paginated
+        try:
+            page = cursor_paginator.page(cursor)
+        except InvalidCursor:
+            raise Http404('Некорректный курсор страницы.')
+        return (
+            cursor_paginator, page, page.object_list, page.has_other_pages()
+        )
 
 
-class IndexView(PostsListMixin):
+class IndexView(AnonymousPageCacheMixin, PostsListMixin):
     """Показать ленту опубликованных постов."""
 
     template_name = 'blog/index.html'
-    queryset = filter_published_posts(Post.objects)
 
+    def get_page_cache_tags(self):
+        return self.get_cache_tags()
+
+    def get_queryset(self):
+        return filter_published_posts(Post.objects)
 
-class CategoryView(PostsListMixin):
-    """Показать опубликованные посты конкретной категории."""
+
+class CategoryView(AnonymousPageCacheMixin, CachedObjectMixin,
+                   PostsListMixin):
+    """
+    Показать опубликованные посты конкретной категории.
+    Если ведутся материализованные ленты категорий,
+    посты выбираются по ним, в порядке записей ленты.
+    """
 
     template_name = 'blog/category.html'
 
-    def get_object(self):
+    @property
+    def cursor_ordering(self):
+        if category_feed.is_enabled():
+            return ('-feed_pub_date', '-feed_post_id')
+        return super().cursor_ordering
+
+    def fetch_object(self, queryset=None):
         return get_object_or_404(
             Category,
             is_published=True,
             slug=self.kwargs.get('category_slug')
         )
 
+    def get_cache_tags(self):
+        return [f'category:{self.get_object().pk}']
+
+    def get_page_cache_tags(self):
+        return self.get_cache_tags()
+
     def get_queryset(self):
+        if not category_feed.is_enabled():
+            return filter_published_posts(self.get_object().posts)
         return filter_published_posts(
-            self.get_object().posts
-        )
+            Post.objects.filter(
+                category_feed_entry__category=self.get_object()
+            ),
+            use_filter=False
+        ).annotate(
+            feed_pub_date=F('category_feed_entry__pub_date'),
+            feed_post_id=F('category_feed_entry__post_id'),
+        ).order_by(*self.cursor_ordering)
 
     def get_context_data(self, **kwargs):
         return dict(
@@ -66,7 +184,8 @@ class CategoryView(PostsListMixin):
         )
 
 
-class ProfileView(PostsListMixin):
+class ProfileView(AnonymousPageCacheMixin, CachedObjectMixin,
+                  PostsListMixin):
     """
     Показать профиль автора и его опубликованные посты.
     Если это страница пользователя, показать все его посты.
@@ -74,16 +193,27 @@ class ProfileView(PostsListMixin):
 
     template_name = 'blog/profile.html'
 
-    def get_object(self):
+    def fetch_object(self, queryset=None):
         return get_object_or_404(
             User, username=self.kwargs.get('username')
         )
 
+    def is_owner(self):
+        return self.get_object() == self.request.user
+
+    def get_cache_tags(self):
+        return [f'author:{self.get_object().pk}']
+
+    def get_page_cache_tags(self):
+        return [*self.get_cache_tags(), f'user:{self.get_object().pk}']
+
+    def get_queryset_variant(self):
+        return 'all' if self.is_owner() else 'visible'
+
     def get_queryset(self):
-        profile = self.get_object()
         return filter_published_posts(
-            profile.posts,
-            profile != self.request.user
+            self.get_object().posts,
+            not self.is_owner()
         )
 
     def get_context_data(self, **kwargs):
@@ -93,30 +223,183 @@ class ProfileView(PostsListMixin):
         )
 
 
-class PostDetailView(DetailView):
-    """Посмотреть конкретную публикацию и комментарии к ней."""
+class SearchView(ListView):
+    """
+    Поиск по публикациям: результаты по релевантности,
+    с отрывками текста и постраничным выводом.
+    """
+
+    template_name = 'blog/search.html'
+    paginate_by = PAGINATE_BY
+    query_kwarg = 'q'
+
+    def get_query(self):
+        return self.request.GET.get(self.query_kwarg, '').strip()
+
+    def get_queryset(self):
+        return filter_published_posts(Post.objects)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = SearchPaginator(self.get_query(), page_size)
+        try:
+            page = paginator.page(
+                queryset, self.request.GET.get(self.page_kwarg, 1)
+            )
+        except InvalidPage:
+            raise Http404('Некорректный номер страницы.')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(query=self.get_query(), **kwargs)
+
+
+class ExportView(UserPassesTestMixin, View):
+    """
+    Выгрузка публикаций или комментариев для сотрудников.
+    Ответ отдаётся потоком, по мере чтения из базы.
+    """
+
+    defaults = {'kind': 'posts', 'format': 'ndjson'}
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        form = ExportForm({**self.defaults, **request.GET.dict()})
+        if not form.is_valid():
+            return HttpResponseBadRequest(
+                form.errors.as_text(), content_type='text/plain'
+            )
+        kind, format = form.cleaned_data['kind'], form.cleaned_data['format']
+        compress = form.cleaned_data['gzip']
+        filename = f'{kind}.{format}'
+        content_type = dumps.EXPORT_FORMATS[format]
+        if compress:
+            filename += '.gz'
+            content_type = 'application/gzip'
+        response = StreamingHttpResponse(
+            dumps.encode_chunks(
+                dumps.export_lines(kind, format, **form.filters()),
+                compress=compress
+            ),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+
+class MetricsView(UserPassesTestMixin, View):
+    """
+    Метрики в формате Prometheus для сотрудников и сборщика: он
+    предъявляет BLOG_METRICS_TOKEN в заголовке Authorization
+    или приходит с адреса из BLOG_METRICS_ALLOWED_IPS.
+    """
+
+    raise_exception = True
+
+    def test_func(self):
+        token = getattr(settings, 'BLOG_METRICS_TOKEN', None)
+        return (
+            self.request.user.is_staff
+            or bool(token) and constant_time_compare(
+                self.request.headers.get('Authorization', ''),
+                f'Bearer {token}'
+            )
+            or self.request.META.get('REMOTE_ADDR')
+            in getattr(settings, 'BLOG_METRICS_ALLOWED_IPS', ())
+        )
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type=CONTENT_TYPE_LATEST)
+
+
+class PostCommentsMixin(CachedObjectMixin):
+    """
+    Публикация, видимая текущему пользователю,
+    и её комментарии порциями по курсору.
+    """
 
     model = Post
-    template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
 
-    def get_object(self):
-        post = super().get_object()
-        if post.author == self.request.user:
-            return post
-        return get_object_or_404(
-            filter_published_posts(Post.objects),
+    def fetch_object(self, queryset=None):
+        post = get_object_or_404(
+            filter_published_posts(Post.objects, use_filter=False),
             pk=self.kwargs[self.pk_url_kwarg]
         )
+        if post.author_id != self.request.user.pk and not post.is_visible:
+            raise Http404('Публикация не найдена.')
+        return post
+
+    def get_comments_paginator(self):
+        return CursorPaginator(
+            self.object.comments.select_related('author'),
+            COMMENTS_PER_PAGE,
+            ordering=('created_at', 'id')
+        )
+
+    def get_comments_page(self):
+        try:
+            return self.get_comments_paginator().page(
+                self.request.GET.get('cursor')
+            )
+        except InvalidCursor:
+            raise Http404('Некорректный курсор комментариев.')
+
+    def get_context_data(self, **kwargs):
+        return dict(
+            comments=self.get_comments_page(),
+            **super().get_context_data(**kwargs)
+        )
+
+
+class PostDetailView(AnonymousPageCacheMixin, PostCommentsMixin,
+                     DetailView):
+    """Посмотреть конкретную публикацию и комментарии к ней."""
+
+    template_name = 'blog/detail.html'
+
+    def get_page_cache_tags(self):
+        post = self.get_object()
+        return [
+            f'post:{post.pk}',
+            f'category:{post.category_id}',
+            f'location:{post.location_id}',
+            f'user:{post.author_id}',
+        ]
+
+    def get_comments_page(self):
+        return self.get_comments_paginator().page()
 
     def get_context_data(self, **kwargs):
         return dict(
             form=CommentForm(),
-            comments=self.get_object().comments.select_related('author'),
             **super().get_context_data(**kwargs)
         )
 
 
+class CommentListView(PostCommentsMixin, DetailView):
+    """Следующая порция комментариев к публикации в виде HTML-фрагмента."""
+
+    template_name = 'includes/comment_list.html'
+
+
+class NewCommentListView(CommentListView):
+    """Комментарии, добавленные после комментария с id из ?since=."""
+
+    def get_comments_page(self):
+        try:
+            since = self.object.comments.only('created_at').get(
+                pk=int(self.request.GET.get('since', ''))
+            )
+        except (ValueError, Comment.DoesNotExist):
+            raise Http404('Комментарий не найден.')
+        paginator = self.get_comments_paginator()
+        return paginator.page(paginator.encode_cursor(since))
+
+
 class PostEditMixin(LoginRequiredMixin):
     model = Post
     template_name = 'blog/create.html'
@@ -130,7 +413,7 @@ class PostFormMixin(PostEditMixin):
         return super().form_valid(form)
 
 
-class PostValidAuthorMixin:
+class PostValidAuthorMixin(CachedObjectMixin):
     """
     Если пользователь - не автор,
     перенаправить на страницу публикации.
@@ -139,11 +422,8 @@ class PostValidAuthorMixin:
     pk_url_kwarg = 'post_id'
 
     def dispatch(self, request, *args, **kwargs):
-        post = get_object_or_404(
-            Post,
-            pk=kwargs[self.pk_url_kwarg]
-        )
-        if post.author != request.user:
+        post = self.get_object()
+        if post.author_id != request.user.pk:
             return redirect(post)
         return super().dispatch(request, *args, **kwargs)
 
@@ -167,14 +447,14 @@ class PostDeleteView(PostEditMixin, PostValidAuthorMixin, DeleteView):
     success_url = reverse_lazy('blog:index')
 
 
-class UserUpdateView(LoginRequiredMixin, UpdateView):
+class UserUpdateView(CachedObjectMixin, LoginRequiredMixin, UpdateView):
     """Редактировать данные пользователя."""
 
     model = User
     fields = ('username', 'first_name', 'last_name', 'email')
     template_name = 'blog/user.html'
 
-    def get_object(self):
+    def fetch_object(self, queryset=None):
         return self.request.user
 
     def get_success_url(self):
@@ -183,7 +463,7 @@ class UserUpdateView(LoginRequiredMixin, UpdateView):
         })
 
 
-class BaseCommentMixin(LoginRequiredMixin):
+class BaseCommentMixin(CachedObjectMixin, LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
@@ -198,8 +478,8 @@ class ValidCommentAuthorMixin(BaseCommentMixin):
 
     def dispatch(self, request, *args, **kwargs):
         comment = self.get_object()
-        if comment.author != request.user:
-            return redirect(comment.post)
+        if comment.author_id != request.user.pk:
+            return redirect('blog:post_detail', post_id=comment.post_id)
         return super().dispatch(request, *args, **kwargs)
 
 
@@ -209,16 +489,30 @@ class CommentCreateView(BaseCommentMixin, CreateView):
     template_name = 'blog/detail.html'
     fields = ('text',)
 
-    def get_object(self):
+    def fetch_object(self, queryset=None):
         return get_object_or_404(
             filter_published_posts(Post.objects),
             pk=self.kwargs.get('post_id')
         )
 
+    @transaction.atomic
     def form_valid(self, form):
         form.instance.author = self.request.user
         form.instance.post = self.get_object()
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        transaction.on_commit(
+            lambda: events.publish_comment(self.object)
+        )
+        return response
+
+
+def comment_stream(request, post_id):
+    """
+    Поток новых комментариев обслуживает ASGI-приложение
+    (blog.events.CommentStreamRouter). Под WSGI потока нет:
+    ответ 204 говорит EventSource не переподключаться.
+    """
+    return HttpResponse(status=204)
 
 
 class CommentUpdateView(ValidCommentAuthorMixin, UpdateView):
@@ -229,3 +523,7 @@ class CommentUpdateView(ValidCommentAuthorMixin, UpdateView):
 
 class CommentDeleteView(ValidCommentAuthorMixin, DeleteView):
     """Удалить комментарий к публикации."""
+
+    @transaction.atomic
+    def delete(self, request, *args, **kwargs):
+        return super().delete(request, *args, **kwargs)
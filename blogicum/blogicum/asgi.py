@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from blog.events import CommentStreamRouter  # noqa: E402
+
+application = CommentStreamRouter(django_application)
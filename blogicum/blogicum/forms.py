@@ -1,6 +1,9 @@
 from django import forms
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+from django.template.loader import render_to_string
+
+from jobs.tasks import send_email
 
 
 User = get_user_model()
@@ -12,3 +15,24 @@ class UserSignUpForm(UserCreationForm):
     class Meta:
         model = User
         fields = ('username', 'first_name', 'last_name', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо для сброса пароля отправляется фоновой задачей."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = ''.join(
+            render_to_string(subject_template_name, context).splitlines()
+        )
+        send_email.delay(
+            subject=subject,
+            message=render_to_string(email_template_name, context),
+            from_email=from_email,
+            recipient_list=[to_email],
+            html_message=(
+                render_to_string(html_email_template_name, context)
+                if html_email_template_name else None
+            ),
+        )
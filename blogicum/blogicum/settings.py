@@ -21,6 +21,7 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -32,6 +33,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.MetricsMiddleware',
+    'blog.middleware.ServerTimingMiddleware',
+    'blog.middleware.SlowQueryLogMiddleware',
+    'blog.middleware.TemplateProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,6 +44,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.ScheduledPublicationMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
@@ -119,3 +125,77 @@ LOGIN_REDIRECT_URL = 'blog:index'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
+
+# Кеш общий для процессов сайта и обработчиков фоновых задач:
+# задачи прогревают страницы и повышают версии тегов кеша.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+BLOG_CATEGORY_FEED_TABLE = True
+
+JOBS_EAGER = False
+
+# Заголовок Server-Timing и лог стоимости запросов для доли запросов;
+# при отладке можно замерять все: 1.0.
+BLOG_SERVER_TIMING = True
+
+BLOG_SERVER_TIMING_SAMPLE_RATE = 0.01
+
+# Запросы к базе дольше порога (мс) пишутся с планом выполнения
+# в файл BLOG_SLOW_QUERY_LOG; None отключает лог.
+BLOG_SLOW_QUERY_MS = 100
+
+BLOG_SLOW_QUERY_LOG = BASE_DIR / 'slow_queries.log'
+
+# Метрики Prometheus по адресу /metrics; отдаются сотрудникам, запросам
+# с заголовком «Authorization: Bearer <BLOG_METRICS_TOKEN>» и адресам
+# из BLOG_METRICS_ALLOWED_IPS. За обратным прокси на той же машине все
+# запросы приходят с 127.0.0.1: там список адресов нужно очистить.
+BLOG_METRICS = True
+
+BLOG_METRICS_TOKEN = os.getenv('BLOG_METRICS_TOKEN')
+
+BLOG_METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+# Время рендеринга по шаблонам, include и тегам для каждого запроса
+# в лог blog.performance. Замедляет рендеринг, включать для отладки.
+BLOG_TEMPLATE_PROFILER = False
+
+BLOG_TEMPLATE_PROFILER_LIMIT = 20
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BLOG_SLOW_QUERY_LOG,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'blog.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'blog.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
@@ -1,10 +1,13 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
+from django.contrib.auth.views import PasswordResetView
 from django.views.generic.edit import CreateView
 from django.urls import include, path, reverse_lazy
 
-from .forms import UserSignUpForm
+from blog.admin import slow_queries_view
+
+from .forms import QueuedPasswordResetForm, UserSignUpForm
 
 
 handler404 = 'pages.views.page_not_found'
@@ -13,7 +16,18 @@ handler500 = 'pages.views.server_error'
 
 urlpatterns = [
     path('pages/', include('pages.urls', namespace='pages')),
+    path(
+        'admin/slow-queries/',
+        admin.site.admin_view(slow_queries_view),
+        name='slow_queries'
+    ),
     path('admin/', admin.site.urls),
+    path('jobs/', include('jobs.urls', namespace='jobs')),
+    path(
+        'auth/password_reset/',
+        PasswordResetView.as_view(form_class=QueuedPasswordResetForm),
+        name='password_reset'
+    ),
     path('auth/', include('django.contrib.auth.urls')),
     path(
         'auth/registration/',
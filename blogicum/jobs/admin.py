@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'task', 'status', 'attempts', 'run_at', 'finished_at'
+    )
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'key')
+    readonly_fields = ('locked_by', 'locked_at', 'created_at', 'finished_at')
+    actions = ('retry',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            finished_at=None,
+        )
+        self.message_user(request, f'Поставлено в очередь: {updated}')
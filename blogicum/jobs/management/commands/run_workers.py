@@ -0,0 +1,33 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import run_pending
+from jobs.worker import WorkerPool
+
+
+class Command(BaseCommand):
+    help = 'Запустить обработчики фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help=('Число процессов-обработчиков; 0 — выполнить задачи '
+                  'в этом процессе и выйти.')
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза между проверками пустой очереди, в секундах.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить задачи, время которых пришло, и выйти.'
+        )
+
+    def handle(self, *args, processes, poll_interval, once, **options):
+        if processes == 0:
+            done = run_pending()
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        self.stdout.write(f'Обработчиков: {processes}')
+        WorkerPool(processes, poll_interval, once).run()
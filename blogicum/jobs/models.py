@@ -0,0 +1,66 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Задача в очереди: имя зарегистрированной функции и её аргументы."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не удалась'),
+    )
+
+    task = models.CharField('Задача', max_length=200)
+    kwargs = models.JSONField('Аргументы', default=dict, blank=True)
+    key = models.CharField(
+        'Ключ',
+        max_length=200,
+        blank=True,
+        help_text=('Пока в очереди есть задача с тем же ключом, '
+                   'новая не добавляется.')
+    )
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Наибольшее число попыток', default=3
+    )
+    run_at = models.DateTimeField('Выполнить не раньше', default=timezone.now)
+    locked_by = models.CharField('Обработчик', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлена', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'задача'
+        verbose_name_plural = 'Задачи'
+        ordering = ('-created_at',)
+        indexes = (
+            models.Index(
+                fields=('run_at', 'id'),
+                condition=models.Q(status='queued'),
+                name='job_queued_idx'
+            ),
+            models.Index(
+                fields=('key',),
+                condition=models.Q(status='queued'),
+                name='job_queued_key_idx'
+            ),
+        )
+
+    def __repr__(self):
+        return (
+            f'<Job: {self.pk=} {self.task=} '
+            f'{self.status=} {self.attempts=}>'
+        )
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,146 @@
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+# Через столько секунд задача, взятая упавшим обработчиком,
+# возвращается в очередь.
+LOCK_TIMEOUT = 60 * 10
+
+
+class Task:
+    """
+    Функция, которую можно выполнить в фоне: task.delay(**kwargs)
+    записывает задачу в базу, а обработчики run_workers её выполняют.
+    Аргументы должны сохраняться в JSON.
+    """
+
+    def __init__(self, func, name, max_attempts, retry_delay):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def __repr__(self):
+        return f'<Task: {self.name}>'
+
+    def delay(self, key='', countdown=0, **kwargs):
+        """
+        Поставить задачу в очередь. Если задан key и в очереди уже
+        есть задача с этим ключом, новая не добавляется.
+        С настройкой JOBS_EAGER задача выполняется сразу.
+        """
+        if getattr(settings, 'JOBS_EAGER', False):
+            return self(**kwargs)
+        run_at = timezone.now() + timedelta(seconds=countdown)
+        if key and Job.objects.filter(
+            status=Job.QUEUED, key=key
+        ).exists():
+            return None
+        return Job.objects.create(
+            task=self.name,
+            kwargs=kwargs,
+            key=key,
+            max_attempts=self.max_attempts,
+            run_at=run_at,
+        )
+
+
+def task(name=None, max_attempts=3, retry_delay=10):
+    """Зарегистрировать функцию как фоновую задачу."""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        TASKS[task_name] = Task(func, task_name, max_attempts, retry_delay)
+        return TASKS[task_name]
+    return decorator
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker=None, now=None):
+    """
+    Взять в работу одну задачу. Задача выбирается из очереди,
+    а затем захватывается условным UPDATE: если другой обработчик
+    успел раньше, строка уже не в очереди и берётся следующая.
+    Возвращает задачу или None, если выполнять нечего.
+    """
+    worker = worker or worker_name()
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=LOCK_TIMEOUT)
+    available = Q(status=Job.QUEUED, run_at__lte=now) | Q(
+        status=Job.RUNNING, locked_at__lt=stale
+    )
+    while True:
+        candidates = list(
+            Job.objects.filter(available).order_by('run_at', 'id')
+            .values_list('pk', flat=True)[:10]
+        )
+        if not candidates:
+            return None
+        for pk in candidates:
+            claimed = Job.objects.filter(available, pk=pk).update(
+                status=Job.RUNNING,
+                locked_by=worker,
+                locked_at=now,
+                attempts=F('attempts') + 1,
+            )
+            if claimed:
+                return Job.objects.get(pk=pk)
+
+
+def run_job(job):
+    """Выполнить захваченную задачу и записать результат."""
+    task = TASKS.get(job.task)
+    try:
+        if task is None:
+            raise LookupError(f'Задача {job.task} не зарегистрирована.')
+        task(**job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        logger.exception('Задача %s не выполнена', job)
+        if task is not None and job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=task.retry_delay * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+    job.locked_by = ''
+    job.locked_at = None
+    job.save(update_fields=(
+        'status', 'run_at', 'last_error', 'finished_at',
+        'locked_by', 'locked_at',
+    ))
+    return job
+
+
+def run_pending(limit=None, worker=None):
+    """Выполнить в текущем процессе все задачи, время которых пришло."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
@@ -0,0 +1,12 @@
+from django.core.mail import send_mail
+
+from .queue import task
+
+
+@task(max_attempts=5, retry_delay=60)
+def send_email(subject, message, recipient_list, from_email=None,
+               html_message=None):
+    send_mail(
+        subject, message, from_email, recipient_list,
+        html_message=html_message
+    )
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('', views.StatusView.as_view(), name='status'),
+]
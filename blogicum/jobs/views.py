@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.views.generic import TemplateView
+
+from .models import Job
+
+
+class StatusView(UserPassesTestMixin, TemplateView):
+    """Состояние очереди задач для сотрудников."""
+
+    template_name = 'jobs/status.html'
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        counts = dict(
+            Job.objects.values_list('status').annotate(Count('id'))
+            .order_by()
+        )
+        oldest = Job.objects.filter(status=Job.QUEUED).aggregate(
+            Min('run_at')
+        )['run_at__min']
+        return super().get_context_data(
+            statuses=[
+                (label, counts.get(status, 0))
+                for status, label in Job.STATUSES
+            ],
+            queue_delay=(
+                max(timezone.now() - oldest, timedelta())
+                if oldest else None
+            ),
+            running=Job.objects.filter(status=Job.RUNNING)[:20],
+            failed=Job.objects.filter(status=Job.FAILED).order_by(
+                '-finished_at'
+            )[:20],
+            **kwargs
+        )
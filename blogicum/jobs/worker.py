@@ -0,0 +1,80 @@
+import logging
+import multiprocessing
+import signal
+import time
+
+import django
+from django.apps import apps
+from django.db import close_old_connections, connections
+
+from .queue import claim, run_job, worker_name
+
+
+logger = logging.getLogger(__name__)
+
+
+def work(stop, poll_interval=1.0, once=False):
+    """
+    Цикл обработчика: брать задачи по одной, пока не попросят
+    остановиться. С once — выйти, когда очередь опустеет.
+    """
+    if not apps.ready:
+        django.setup()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker = worker_name()
+    while not stop.is_set():
+        close_old_connections()
+        job = claim(worker)
+        if job is not None:
+            run_job(job)
+            continue
+        if once:
+            break
+        stop.wait(poll_interval)
+
+
+class WorkerPool:
+    """
+    Пул процессов-обработчиков. Каждый процесс сам берёт задачи
+    из базы, поэтому брокер не нужен; упавший процесс
+    перезапускается, пока пул не остановлен.
+    """
+
+    def __init__(self, processes, poll_interval=1.0, once=False):
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.once = once
+        self.context = multiprocessing.get_context()
+        self.stop = self.context.Event()
+        self.workers = []
+
+    def _start_worker(self):
+        process = self.context.Process(
+            target=work,
+            args=(self.stop, self.poll_interval, self.once),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def run(self):
+        # Открытые соединения с базой нельзя делить между процессами.
+        connections.close_all()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: self.stop.set())
+        self.workers = [
+            self._start_worker() for _ in range(self.processes)
+        ]
+        while self.workers:
+            for process in list(self.workers):
+                if process.is_alive():
+                    continue
+                process.join()
+                self.workers.remove(process)
+                if process.exitcode and not self.stop.is_set():
+                    logger.warning(
+                        'Обработчик %s завершился с кодом %s, перезапуск',
+                        process.pid, process.exitcode
+                    )
+                    self.workers.append(self._start_worker())
+            time.sleep(0.2)
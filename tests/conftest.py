@@ -18,6 +18,7 @@ from typing import (
 
 import pytest
 from django.apps import apps
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.db.models import Model, Field
 from django.forms import BaseForm
@@ -41,6 +42,23 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    location = tmp_path_factory.mktemp("cache")
+    with override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": location,
+    }}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -93,6 +111,7 @@ pytest_plugins = [
     "fixtures.categories",
     "fixtures.comments",
     "adapters.comment",
+    "plugins.query_budget",
 ]
 
 
@@ -363,7 +382,16 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
                     os.remove(file_path)
+
+    for root, dirs, files in os.walk(image_dir, topdown=False):
+        if (
+                Path(root).parent != image_dir
+                and not os.listdir(root)
+                and os.path.getctime(root) >= start_time
+        ):
+            os.rmdir(root)
@@ -0,0 +1,143 @@
+"""
+Бюджет запросов к базе данных для каждого запроса через тестовый Client.
+
+Каждый ответ сравнивается с бюджетом его view (для POST — отдельный
+бюджет). Бюджеты — постоянные числа: если на странице появится N+1,
+число запросов вырастет вместе с числом постов или комментариев
+в фикстуре и тест упадёт с перечнем запросов и строк шаблонов,
+из которых они пришли.
+
+Отключить проверку для теста: ``@pytest.mark.no_query_budget``.
+Максимумы по всем тестам: ``pytest --query-counts``.
+"""
+from collections import defaultdict
+
+import pytest
+from django.test.client import Client
+from django.urls import Resolver404, resolve
+
+from blog.profiling import profile
+
+# Запросы сверх бюджета view: сессия и пользователь у авторизованного
+# клиента и проверка отложенных публикаций из SCHEDULE_SOURCE — она
+# ходит в базу, только если времени следующей публикации нет в кеше,
+# поэтому вычитаются лишь действительно выполненные её запросы.
+AUTH_QUERIES = 2
+SCHEDULE_SOURCE = "blog/scheduling.py:"
+QUERY_BUDGETS = {
+    ("blog:index", "GET"): 2,
+    ("blog:category_posts", "GET"): 3,
+    ("blog:profile", "GET"): 3,
+    ("blog:post_detail", "GET"): 2,
+    ("blog:comments", "GET"): 2,
+    ("blog:new_comments", "GET"): 4,
+    ("blog:comment_stream", "GET"): 0,
+    ("blog:search", "GET"): 2,
+    ("blog:export", "GET"): 1,
+    ("blog:metrics", "GET"): 1,
+    ("blog:create_post", "GET"): 2,
+    ("blog:create_post", "POST"): 14,
+    ("blog:edit_post", "GET"): 3,
+    ("blog:edit_post", "POST"): 12,
+    ("blog:delete_post", "GET"): 1,
+    ("blog:delete_post", "POST"): 16,
+    ("blog:add_comment", "POST"): 7,
+    ("blog:edit_comment", "GET"): 1,
+    ("blog:edit_comment", "POST"): 3,
+    ("blog:delete_comment", "GET"): 1,
+    ("blog:delete_comment", "POST"): 5,
+    ("blog:edit_profile", "GET"): 0,
+    ("blog:edit_profile", "POST"): 4,
+    ("pages:about", "GET"): 0,
+    ("pages:rules", "GET"): 0,
+    ("jobs:status", "GET"): 4,
+    ("login", "GET"): 0,
+    ("logout", "GET"): 4,
+    ("registration", "GET"): 0,
+    ("password_change", "GET"): 0,
+    ("password_change_done", "GET"): 0,
+    ("password_reset", "GET"): 0,
+    ("password_reset", "POST"): 2,
+    ("password_reset_done", "GET"): 0,
+    ("password_reset_confirm", "GET"): 5,
+    ("password_reset_complete", "GET"): 0,
+}
+_counts = defaultdict(int)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--query-counts", action="store_true",
+        help="Показать наибольшее число запросов к базе для каждого view.",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "no_query_budget: не проверять число запросов к базе в тесте.",
+    )
+
+
+def view_name(path):
+    try:
+        return resolve(path.split("?")[0]).view_name
+    except Resolver404:
+        return None
+
+
+def describe(queries):
+    lines = []
+    for number, query in enumerate(queries, 1):
+        where = ", ".join(filter(None, (query.template, query.source)))
+        lines.append(f"{number}. [{where or '?'}] {query.sql}")
+    return "\n".join(lines)
+
+
+@pytest.fixture(autouse=True)
+def query_budget(request, monkeypatch):
+    if request.node.get_closest_marker("no_query_budget"):
+        yield
+        return
+    client_request = Client.request
+
+    def budgeted_request(self, **environ):
+        with profile(keep_queries=True) as result:
+            response = client_request(self, **environ)
+        name = view_name(environ["PATH_INFO"])
+        key = (name, environ["REQUEST_METHOD"])
+        user = getattr(response.wsgi_request, "user", None)
+        extra = sum(
+            1 for query in result.queries
+            if (query.source or "").startswith(SCHEDULE_SOURCE)
+        )
+        if user is not None and user.is_authenticated:
+            extra += AUTH_QUERIES
+        count = result.query_count - extra
+        _counts[key] = max(_counts[key], count)
+        budget = QUERY_BUDGETS.get(key)
+        if budget is not None and count > budget:
+            pytest.fail(
+                f"Убедитесь, что {name} ({environ['PATH_INFO']}) выполняет"
+                f" не больше {budget + extra} запросов к базе данных."
+                f" Выполнено {result.query_count}:\n"
+                f"{describe(result.queries)}",
+                pytrace=False,
+            )
+        return response
+
+    monkeypatch.setattr(Client, "request", budgeted_request)
+    yield
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not config.getoption("--query-counts"):
+        return
+    terminalreporter.section("Запросы к базе по view")
+    for (name, method), count in sorted(
+            _counts.items(), key=lambda item: str(item[0])
+    ):
+        budget = QUERY_BUDGETS.get((name, method), "-")
+        terminalreporter.write_line(
+            f"{str(name):<32} {method:<6} {count:>4} (бюджет {budget})"
+        )
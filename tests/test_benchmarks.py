@@ -0,0 +1,79 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from blog import benchmarks
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, pub_date=timezone.now() - timedelta(days=1),
+    )
+    mixer.blend("blog.Comment", post=post, author=user)
+    return post
+
+
+def test_benchmark_covers_routes(post):
+    results = benchmarks.run(requests=1)
+    for key in (
+        "blog:index [anon]", "blog:post_detail [user]",
+        "blog:edit_comment [user]", "pages:about [anon]",
+        "login [anon]", "password_reset_confirm [anon]",
+    ):
+        assert key in results, f"Убедитесь, что замеряется {key}."
+    index = results["blog:index [anon]"]
+    assert index["status"] == 200
+    assert index["queries"] > 0 and index["template"] > 0
+    assert index["size"] > 0
+
+
+def test_benchmark_leaves_site_data(post):
+    cache.set("benchmark-canary", 1)
+    sessions = Session.objects.count()
+    benchmarks.run(requests=2)
+    benchmarks.profile_page("blog:index", requests=2, as_author=True)
+    assert cache.get("benchmark-canary") == 1, (
+        "Убедитесь, что замеры не очищают общий кеш сайта."
+    )
+    assert Session.objects.count() == sessions, (
+        "Убедитесь, что сессии, созданные замерами, удаляются."
+    )
+
+
+def test_compare_reports_regressions():
+    old = {"p50": 10, "p95": 12, "queries": 5, "sql": 1, "template": 5,
+           "size": 1000}
+    noisy = {**old, "p50": 11, "p95": 13.5}
+    worse = {**old, "queries": 6, "p95": 30}
+    assert benchmarks.compare({"a": noisy}, {"a": old}, 0.2) == []
+    assert {
+        metric for key, metric, *values in
+        benchmarks.compare({"a": worse}, {"a": old}, 0.2)
+    } == {"queries", "p95"}
+
+
+def test_benchmark_command_fails_on_regression(post, tmp_path):
+    path = tmp_path / "baseline.json"
+    call_command(
+        "benchmark_urls", requests=1, baseline=str(path), save=True,
+        stdout=StringIO(),
+    )
+    baseline = json.loads(path.read_text())
+    baseline["blog:index [anon]"]["queries"] -= 1
+    path.write_text(json.dumps(baseline))
+    with pytest.raises(CommandError):
+        call_command(
+            "benchmark_urls", requests=1, baseline=str(path),
+            threshold=100, stdout=StringIO(), stderr=StringIO(),
+        )
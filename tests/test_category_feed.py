@@ -0,0 +1,71 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Category, CategoryFeedEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def feed_post_ids(category):
+    return set(
+        CategoryFeedEntry.objects.filter(category=category).values_list(
+            "post_id", flat=True
+        )
+    )
+
+
+def test_category_feed_follows_visibility(
+        published_category, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    assert feed_post_ids(published_category) == {post.id for post in posts}
+
+    posts[0].is_published = False
+    posts[0].save()
+    assert posts[0].id not in feed_post_ids(published_category), (
+        "Убедитесь, что снятый с публикации пост удаляется из ленты"
+        " категории."
+    )
+
+    published_category.is_published = False
+    published_category.save()
+    assert not feed_post_ids(published_category)
+
+    published_category.is_published = True
+    published_category.save()
+    assert feed_post_ids(published_category) == {
+        post.id for post in posts[1:]
+    }
+
+
+def test_rebuild_category_feed(
+        published_category, many_posts_with_published_locations
+):
+    CategoryFeedEntry.objects.all().delete()
+    call_command("rebuild_category_feed", batch_size=7, stdout=StringIO())
+    assert feed_post_ids(published_category) == {
+        post.id for post in many_posts_with_published_locations
+    }
+
+
+def test_category_edit_keeps_feed(
+        published_category, many_posts_with_published_locations
+):
+    entries = set(
+        CategoryFeedEntry.objects.filter(
+            category=published_category
+        ).values_list("pk", flat=True)
+    )
+    category = Category.objects.get(pk=published_category.pk)
+    category.description = "Новое описание"
+    category.save()
+    assert set(
+        CategoryFeedEntry.objects.filter(
+            category=published_category
+        ).values_list("pk", flat=True)
+    ) == entries, (
+        "Убедитесь, что лента категории пересобирается, только когда"
+        " меняется is_published."
+    )
@@ -0,0 +1,44 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer, post_with_published_location, post_of_another_author
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что при создании комментария увеличивается"
+        " сохранённое число комментариев публикации."
+    )
+
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+    comments[1].post = post_of_another_author
+    comments[1].save()
+    post.refresh_from_db()
+    post_of_another_author.refresh_from_db()
+    assert (post.comment_count, post_of_another_author.comment_count) == (
+        1, 1
+    ), "Убедитесь, что перенос комментария обновляет счётчики обоих постов."
+
+
+def test_recount_comments_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    type(post).objects.update(comment_count=0)
+
+    call_command("recount_comments", batch_size=1, stdout=StringIO())
+
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что команда `recount_comments` восстанавливает"
+        " число комментариев."
+    )
@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+import pytest
+
+from blog.views import COMMENTS_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def long_thread(mixer, post_with_published_location):
+    return mixer.cycle(COMMENTS_PER_PAGE * 2 + 5).blend(
+        "blog.Comment", post=post_with_published_location
+    )
+
+
+def test_detail_page_shows_first_comments(
+        user_client, post_with_published_location, long_thread
+):
+    response = user_client.get(f"/posts/{post_with_published_location.id}/")
+    comments = response.context["comments"]
+    assert [comment.id for comment in comments] == [
+        comment.id for comment in long_thread[:COMMENTS_PER_PAGE]
+    ], (
+        "Убедитесь, что на странице поста выводится только первая порция"
+        " комментариев, «от старых к новым»."
+    )
+    assert comments.has_next()
+
+
+def test_comment_fragments_cover_thread(
+        user_client, post_with_published_location, long_thread
+):
+    post_id = post_with_published_location.id
+    comments = user_client.get(f"/posts/{post_id}/").context["comments"]
+    seen = [comment.id for comment in comments]
+    while comments.has_next():
+        response = user_client.get(
+            f"/posts/{post_id}/comments/", {"cursor": comments.next_cursor}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert "<html" not in response.content.decode(), (
+            "Убедитесь, что порция комментариев отдаётся HTML-фрагментом."
+        )
+        comments = response.context["comments"]
+        seen.extend(comment.id for comment in comments)
+    assert seen == [comment.id for comment in long_thread]
+
+
+def test_new_comments_since(
+        user_client, post_with_published_location, long_thread
+):
+    since = long_thread[-3]
+    response = user_client.get(
+        f"/posts/{post_with_published_location.id}/comments/new/",
+        {"since": since.id},
+    )
+    assert [comment.id for comment in response.context["comments"]] == [
+        comment.id for comment in long_thread[-2:]
+    ], "Убедитесь, что выводятся только комментарии новее указанного."
+
+    response = user_client.get(
+        f"/posts/{post_with_published_location.id}/comments/new/",
+        {"since": "abc"},
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_comment_fragments_of_hidden_post(
+        another_user_client, post_with_published_location, long_thread
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    response = another_user_client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что комментарии к скрытому посту недоступны."
+    )
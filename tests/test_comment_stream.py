@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from blog.events import CommentStreamRouter, broker, comment_stream
+
+pytestmark = [pytest.mark.django_db]
+
+
+async def open_stream(app, path, action, headers=()):
+    """Подключиться к потоку, выполнить action и вернуть сообщения."""
+    messages = []
+    disconnect = asyncio.Event()
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "method": "GET", "path": path,
+        "headers": list(headers),
+    }
+    task = asyncio.ensure_future(app(scope, receive, send))
+    for _ in range(100):
+        if messages:
+            break
+        await asyncio.sleep(0.01)
+    await action()
+    await asyncio.sleep(0.05)
+    disconnect.set()
+    await asyncio.wait_for(task, 1)
+    return messages
+
+
+async def unused_app(scope, receive, send):
+    raise AssertionError("Поток комментариев не должен доходить до Django.")
+
+
+def events(messages):
+    body = b"".join(
+        message.get("body", b"") for message in messages[1:]
+    ).decode()
+    return [
+        json.loads(line[len("data: "):])
+        for line in body.splitlines() if line.startswith("data: ")
+    ]
+
+
+def test_stream_pushes_new_comment(post_with_published_location):
+    post_id = post_with_published_location.id
+
+    async def publish():
+        broker.publish(post_id, {"id": 1, "html": "<p>Новый</p>"})
+
+    messages = async_to_sync(open_stream)(
+        CommentStreamRouter(unused_app),
+        f"/posts/{post_id}/comments/stream/", publish,
+    )
+    assert messages[0]["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in (
+        messages[0]["headers"]
+    )
+    assert events(messages) == [{"id": 1, "html": "<p>Новый</p>"}], (
+        "Убедитесь, что поток отдаёт подписчику новый комментарий."
+    )
+    assert broker.subscriber_count(post_id) == 0, (
+        "Убедитесь, что после отключения клиента подписка удаляется."
+    )
+
+
+def test_stream_replays_missed_comments(
+        mixer, post_with_published_location
+):
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=post_with_published_location
+    )
+
+    async def nothing():
+        pass
+
+    messages = async_to_sync(open_stream)(
+        CommentStreamRouter(unused_app),
+        f"/posts/{post_with_published_location.id}/comments/stream/",
+        nothing,
+        headers=[(b"last-event-id", str(comments[0].id).encode())],
+    )
+    assert [event["id"] for event in events(messages)] == [
+        comment.id for comment in comments[1:]
+    ], "Убедитесь, что по Last-Event-ID досылаются пропущенные комментарии."
+
+
+def test_stream_hidden_post(unpublished_posts_with_published_locations):
+    async def nothing():
+        pass
+
+    post = unpublished_posts_with_published_locations[0]
+    messages = async_to_sync(open_stream)(
+        CommentStreamRouter(unused_app),
+        f"/posts/{post.id}/comments/stream/", nothing,
+    )
+    assert messages[0]["status"] == 404
+
+
+def test_comment_create_publishes(
+        user_client, post_with_published_location,
+        django_capture_on_commit_callbacks, monkeypatch
+):
+    published = []
+    monkeypatch.setattr(
+        broker, "publish",
+        lambda post_id, event: published.append((post_id, event)),
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        user_client.post(
+            f"/posts/{post_with_published_location.id}/comment/",
+            {"text": "Живой комментарий"},
+        )
+    assert len(published) == 1, (
+        "Убедитесь, что новый комментарий рассылается подписчикам"
+        " после фиксации транзакции."
+    )
+    post_id, event = published[0]
+    assert post_id == post_with_published_location.id
+    assert "Живой комментарий" in event["html"]
+
+
+def test_stream_cancels_wait_when_send_fails(post_with_published_location):
+    post_id = post_with_published_location.id
+    cancelled = []
+
+    async def receive():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def send(message):
+        if message.get("body"):
+            raise OSError("Соединение оборвалось")
+
+    async def run():
+        scope = {"type": "http", "method": "GET", "headers": []}
+        task = asyncio.ensure_future(
+            comment_stream(scope, receive, send, post_id)
+        )
+        while not broker.subscriber_count(post_id):
+            await asyncio.sleep(0.01)
+        broker.publish(post_id, {"id": 1, "html": "<p>Новый</p>"})
+        with pytest.raises(OSError):
+            await asyncio.wait_for(task, 1)
+        await asyncio.sleep(0)
+        assert cancelled, (
+            "Убедитесь, что ожидание отключения клиента отменяется,"
+            " когда поток обрывается."
+        )
+
+    async_to_sync(run)()
+    assert broker.subscriber_count(post_id) == 0
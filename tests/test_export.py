@@ -0,0 +1,82 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    now = timezone.now()
+    old = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, title="Старый", pub_date=now - timedelta(days=30),
+    )
+    new = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, title="Новый", pub_date=now,
+    )
+    mixer.blend("blog.Comment", post=new, author=user, text="Отлично")
+    return old, new
+
+
+def read(response):
+    return b"".join(response.streaming_content)
+
+
+def test_export_requires_staff(user_client):
+    assert user_client.get("/export/").status_code == 403
+
+
+def test_export_posts_ndjson(admin_client, posts):
+    response = admin_client.get("/export/")
+    assert response.streaming, "Убедитесь, что выгрузка отдаётся потоком."
+    rows = [json.loads(line) for line in read(response).splitlines()]
+    assert [row["title"] for row in rows] == ["Старый", "Новый"]
+    assert rows[0]["category"] == posts[0].category.slug
+    assert rows[0]["author"] == posts[0].author.username
+
+
+def test_export_filters(admin_client, posts):
+    since = (timezone.now() - timedelta(days=1)).date().isoformat()
+    rows = [
+        json.loads(line) for line in
+        read(admin_client.get("/export/", {"since": since})).splitlines()
+    ]
+    assert [row["id"] for row in rows] == [posts[1].id], (
+        "Убедитесь, что выгрузка учитывает диапазон дат."
+    )
+    response = admin_client.get("/export/", {"author": "nobody"})
+    assert response.status_code == 400
+
+
+def test_export_comments_csv_gzip(admin_client, posts):
+    response = admin_client.get(
+        "/export/", {"kind": "comments", "format": "csv", "gzip": "1"}
+    )
+    assert response["Content-Type"] == "application/gzip"
+    text = gzip.decompress(read(response)).decode()
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert [(row["post"], row["text"]) for row in rows] == [
+        (str(posts[1].id), "Отлично")
+    ]
+
+
+def test_export_command(tmp_path, posts):
+    path = tmp_path / "posts.csv.gz"
+    call_command(
+        "export_content", "posts", str(path), format="csv",
+        chunk_size=1, stdout=StringIO()
+    )
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        assert len(list(csv.DictReader(file))) == 2
+    out = StringIO()
+    call_command("export_content", "comments", stdout=out)
+    assert json.loads(out.getvalue())["text"] == "Отлично"
@@ -0,0 +1,81 @@
+import io
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.dumps import iter_json_array
+from blog.models import CategoryFeedEntry, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+DUMP = [
+    {
+        "model": "blog.comment", "pk": 7,
+        "fields": {
+            "text": "Первый!", "post": 30, "author": 20,
+            "created_at": "2023-01-02T10:00:00Z",
+        },
+    },
+    {
+        "model": "blog.post", "pk": 30,
+        "fields": {
+            "title": "Импорт", "text": "Пост из большого дампа " * 5,
+            "pub_date": "2023-01-01T10:00:00Z", "author": 20,
+            "location": None, "category": 10, "image": "",
+            "is_published": True, "created_at": "2023-01-01T10:00:00Z",
+        },
+    },
+    {
+        "model": "auth.user", "pk": 20,
+        "fields": {
+            "username": "importer", "password": "!", "groups": [],
+            "user_permissions": [],
+        },
+    },
+    {
+        "model": "blog.category", "pk": 10,
+        "fields": {
+            "title": "Архив", "description": "Старые посты",
+            "slug": "archive", "is_published": True,
+            "created_at": "2023-01-01T10:00:00Z",
+        },
+    },
+]
+
+
+def test_iter_json_array_reads_across_chunks():
+    text = json.dumps(DUMP, ensure_ascii=False, indent=2)
+    items = list(iter_json_array(io.StringIO(text), read_size=7))
+    assert items == DUMP
+
+
+def test_import_dump(tmp_path, client):
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps(DUMP, ensure_ascii=False), encoding="utf-8")
+    call_command("import_dump", str(path), batch_size=1, stdout=StringIO())
+    post = Post.objects.get(pk=30)
+    assert post.is_visible and post.comment_count == 1, (
+        "Убедитесь, что после загрузки пересчитываются видимость"
+        " и число комментариев."
+    )
+    assert post.excerpt.startswith("Пост из большого дампа")
+    comment = Comment.objects.get(pk=7)
+    assert comment.post_id == 30, (
+        "Убедитесь, что первичные ключи из дампа сохраняются."
+    )
+    assert comment.created_at.year == 2023, (
+        "Убедитесь, что время создания берётся из дампа."
+    )
+    assert CategoryFeedEntry.objects.filter(post=post).exists()
+    assert [p.id for p in client.get("/search/", {"q": "дамп"}).context[
+        "page_obj"
+    ]] == [30]
+    new_post = Post.objects.create(
+        title="Новый", text="Текст", author=post.author,
+        category=post.category, pub_date=post.pub_date,
+    )
+    assert new_post.pk > 30, (
+        "Убедитесь, что после загрузки сбрасываются счётчики ключей."
+    )
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim, run_job, run_pending, task
+
+pytestmark = [pytest.mark.django_db]
+
+CALLS = []
+
+
+@task(name="tests.record", max_attempts=2, retry_delay=0)
+def record(value):
+    CALLS.append(value)
+    if value == "fail":
+        raise ValueError(value)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    CALLS.clear()
+
+
+def test_job_runs_in_worker_not_in_request():
+    job = record.delay(value=1)
+    assert CALLS == [] and job.status == Job.QUEUED
+    assert run_pending() == 1
+    job.refresh_from_db()
+    assert CALLS == [1] and job.status == Job.DONE
+
+
+def test_job_is_claimed_once():
+    record.delay(value=1)
+    job = claim("first")
+    assert job is not None and job.locked_by == "first"
+    assert claim("second") is None, (
+        "Убедитесь, что задачу, взятую одним обработчиком,"
+        " не может взять другой."
+    )
+
+
+def test_failed_job_is_retried():
+    job = record.delay(value="fail")
+    run_job(claim())
+    job.refresh_from_db()
+    assert job.status == Job.QUEUED and job.attempts == 1, (
+        "Убедитесь, что неудачная задача возвращается в очередь."
+    )
+    assert "ValueError" in job.last_error
+    run_job(claim(now=timezone.now() + timedelta(seconds=1)))
+    job.refresh_from_db()
+    assert job.status == Job.FAILED and job.attempts == 2, (
+        "Убедитесь, что после последней попытки задача считается неудачной."
+    )
+
+
+def test_stale_job_is_reclaimed():
+    job = record.delay(value=1)
+    claim("crashed")
+    assert claim("alive") is None
+    later = timezone.now() + timedelta(hours=1)
+    assert claim("alive", now=later).pk == job.pk, (
+        "Убедитесь, что задача упавшего обработчика возвращается в работу."
+    )
+
+
+def test_keyed_jobs_are_not_duplicated():
+    record.delay(key="same", value=1)
+    record.delay(key="same", value=2)
+    assert Job.objects.count() == 1
+
+
+def test_password_reset_email_is_queued(client, user):
+    user.email = "user@example.com"
+    user.save()
+    client.post("/auth/password_reset/", {"email": user.email})
+    assert len(mail.outbox) == 0, (
+        "Убедитесь, что письмо отправляется фоновой задачей."
+    )
+    run_pending()
+    assert [message.to for message in mail.outbox] == [[user.email]]
+
+
+def test_status_view_is_for_staff(admin_client, user_client):
+    record.delay(value="fail")
+    run_pending()
+    assert user_client.get("/jobs/").status_code == HTTPStatus.FORBIDDEN
+    response = admin_client.get("/jobs/")
+    assert response.status_code == HTTPStatus.OK
+    assert "tests.record" in response.content.decode()
@@ -0,0 +1,109 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.models import Post, StoredFile
+from blog.storage import post_image_storage
+
+pytestmark = [pytest.mark.django_db]
+
+
+def image_bytes(color):
+    img_io = BytesIO()
+    Image.new("RGB", (60, 40), color=color).save(img_io, format="JPEG")
+    return img_io.getvalue()
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(content):
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            image=ImageFile(BytesIO(content), name="upload.JPG"),
+        )
+    return make
+
+
+def references(name):
+    return StoredFile.objects.get(name=name).references
+
+
+def test_upload_is_named_by_content(make_post):
+    post = make_post(image_bytes((1, 2, 3)))
+    name = post.image.name
+    assert post_image_storage.is_content_name(name), (
+        "Убедитесь, что фото сохраняется под именем по хешу содержимого"
+        " во вложенных каталогах."
+    )
+    assert name.startswith("post_images/") and name.endswith(".jpg")
+    assert references(name) == 1
+
+
+def test_identical_uploads_are_stored_once(make_post):
+    content = image_bytes((4, 5, 6))
+    first, second = make_post(content), make_post(content)
+    assert first.image.name == second.image.name, (
+        "Убедитесь, что одинаковые загрузки хранятся одним файлом."
+    )
+    assert references(first.image.name) == 2
+    first.delete()
+    assert post_image_storage.exists(second.image.name), (
+        "Убедитесь, что файл не удаляется, пока на него ссылается пост."
+    )
+    second.delete()
+    assert not post_image_storage.exists(second.image.name)
+    assert not StoredFile.objects.filter(name=second.image.name).exists()
+
+
+def test_replaced_image_is_released(make_post):
+    post = make_post(image_bytes((7, 8, 9)))
+    old_name = post.image.name
+    post.image = ImageFile(BytesIO(image_bytes((9, 8, 7))), name="new.jpg")
+    post.save()
+    assert not post_image_storage.exists(old_name)
+    assert references(post.image.name) == 1
+
+
+def test_migrate_media_moves_flat_files(make_post):
+    post = make_post(image_bytes((10, 11, 12)))
+    hashed_name = post.image.name
+    post.delete()
+    with open(post_image_storage.path("post_images/legacy.jpg"), "wb") as f:
+        f.write(image_bytes((10, 11, 12)))
+    post = make_post(image_bytes((13, 14, 15)))
+    Post.objects.filter(pk=post.pk).update(image="post_images/legacy.jpg")
+    StoredFile.objects.all().delete()
+    call_command("migrate_media", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image.name == hashed_name, (
+        "Убедитесь, что migrate_media переносит файлы со старыми именами."
+    )
+    assert post_image_storage.exists(hashed_name)
+    assert not post_image_storage.exists("post_images/legacy.jpg")
+    assert references(hashed_name) == 1
+
+
+def test_upload_keeps_file_released_meanwhile(make_post, monkeypatch):
+    content = image_bytes((16, 17, 18))
+    first = make_post(content)
+    name = first.image.name
+    exists = post_image_storage.exists
+
+    def check_then_release(checked_name):
+        # Файл уже есть, но пост с ним удаляют до сохранения нового.
+        monkeypatch.undo()
+        found = exists(checked_name)
+        Post.objects.filter(pk=first.pk).update(image="")
+        StoredFile.objects.release([name])
+        return found
+
+    monkeypatch.setattr(post_image_storage, "exists", check_then_release)
+    second = make_post(content)
+    assert second.image.name == name
+    assert post_image_storage.exists(name), (
+        "Убедитесь, что файл, на который ссылается новый пост, не удаляется."
+    )
+    assert references(name) == 1
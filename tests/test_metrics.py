@@ -0,0 +1,150 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.test import Client, override_settings
+from prometheus_client.parser import text_string_to_metric_families
+
+from blog import metrics
+from jobs.models import Job
+
+pytestmark = [pytest.mark.django_db]
+
+
+def read_metrics(content):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(content)
+        for sample in family.samples
+    }
+
+
+def scrape():
+    response = Client().get("/metrics")
+    assert response.status_code == 200, (
+        "Убедитесь, что страница /metrics доступна с адресов"
+        " из BLOG_METRICS_ALLOWED_IPS."
+    )
+    return read_metrics(response.content.decode())
+
+
+def value(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0)
+
+
+def test_request_metrics_per_view(post_with_published_location, user_client):
+    before = scrape()
+    Client().get("/")
+    Client().get("/")
+    user_client.get(f"/posts/{post_with_published_location.id}/")
+    after = scrape()
+
+    index = {"view": "blog:index"}
+    assert value(
+        after, "blog_requests_total", method="GET", status="200", **index
+    ) - value(
+        before, "blog_requests_total", method="GET", status="200", **index
+    ) == 2, "Убедитесь, что запросы считаются по имени маршрута."
+    for name in (
+            "blog_request_duration_seconds_count", "blog_db_queries_count",
+            "blog_db_duration_seconds_count",
+    ):
+        assert value(after, name, **index) - value(before, name, **index) == 2
+    detail = {"view": "blog:post_detail"}
+    assert value(after, "blog_db_queries_sum", **detail) > value(
+        before, "blog_db_queries_sum", **detail
+    )
+
+
+def test_cache_reads_counted_once(post_with_published_location):
+    Client().get("/")
+    before = scrape()
+    response = Client().get("/")
+    after = scrape()
+    assert response["X-Page-Cache"] == "hit"
+    index = {"view": "blog:index"}
+    # Время следующей публикации, теги страницы, версия ленты
+    # (через get_many) и сама страница.
+    assert value(
+        after, "blog_cache_requests_total", result="hit", **index
+    ) - value(
+        before, "blog_cache_requests_total", result="hit", **index
+    ) == 4, "Убедитесь, что каждое чтение из кеша учитывается один раз."
+    assert value(
+        after, "blog_cache_requests_total", result="miss", **index
+    ) == value(before, "blog_cache_requests_total", result="miss", **index)
+
+
+def test_created_counters_and_queue_depth(mixer, post_with_published_location):
+    before = scrape()
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    mixer.blend("blog.Post")
+    Job.objects.all().delete()
+    mixer.cycle(3).blend(
+        Job, task="blog.tasks.make_image_variants", status=Job.QUEUED
+    )
+    mixer.blend(Job, task="blog.tasks.make_image_variants", status=Job.DONE)
+    after = scrape()
+
+    for name in ("blog_posts_created_total", "blog_comments_created_total"):
+        assert value(after, name) - value(before, name) == 1, (
+            f"Убедитесь, что метрика {name} растёт при создании объекта."
+        )
+    assert value(
+        after, "blog_job_queue_depth", task="blog.tasks.make_image_variants"
+    ) == 3, "Убедитесь, что /metrics показывает число задач в очереди."
+
+
+def test_metrics_forbidden_for_others(user_client, admin_client):
+    assert Client(REMOTE_ADDR="192.0.2.1").get("/metrics").status_code == 403
+    user_client.defaults["REMOTE_ADDR"] = "192.0.2.1"
+    assert user_client.get("/metrics").status_code == 403
+    admin_client.defaults["REMOTE_ADDR"] = "192.0.2.1"
+    assert admin_client.get("/metrics").status_code == 200
+
+
+@override_settings(BLOG_METRICS_TOKEN="secret", BLOG_METRICS_ALLOWED_IPS=[])
+def test_metrics_token():
+    assert Client().get("/metrics").status_code == 403, (
+        "Убедитесь, что без токена и разрешённого адреса метрики недоступны."
+    )
+    assert Client(HTTP_AUTHORIZATION="Bearer wrong").get(
+        "/metrics"
+    ).status_code == 403
+    assert Client(HTTP_AUTHORIZATION="Bearer secret").get(
+        "/metrics"
+    ).status_code == 200, (
+        "Убедитесь, что сборщик с BLOG_METRICS_TOKEN получает метрики."
+    )
+
+
+INCREMENT = """
+import django
+django.setup()
+from blog import metrics
+metrics.POSTS_CREATED.inc()
+metrics.REQUESTS.labels("blog:index", "GET", 200).inc(2)
+"""
+
+
+def test_metrics_from_all_processes(tmp_path, monkeypatch):
+    blogicum = Path(__file__).parent.parent / "blogicum"
+    env = {
+        **os.environ,
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path),
+        "DJANGO_SETTINGS_MODULE": "blogicum.settings",
+        "PYTHONPATH": str(blogicum),
+    }
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c", INCREMENT], env=env, check=True
+        )
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    samples = read_metrics(metrics.render().decode())
+    assert value(samples, "blog_posts_created_total") == 2
+    assert value(
+        samples, "blog_requests_total",
+        view="blog:index", method="GET", status="200",
+    ) == 4, "Убедитесь, что метрики складываются по всем процессам."
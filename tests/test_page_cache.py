@@ -0,0 +1,178 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from prometheus_client import REGISTRY
+
+from blog import metrics, tasks
+
+pytestmark = [pytest.mark.django_db]
+
+
+def page_cache_counts():
+    return {
+        result: sum(
+            REGISTRY.get_sample_value(
+                "blog_page_cache_requests_total",
+                {"view": view, "result": result},
+            ) or 0
+            for view in (
+                "blog:index", "blog:category_posts", "blog:profile",
+                "blog:post_detail",
+            )
+        )
+        for result in ("hit", "miss")
+    }
+
+
+def get_twice(client, url):
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, len(queries)
+
+
+def test_anonymous_pages_are_cached(
+        unlogged_client, user, published_category,
+        post_with_published_location
+):
+    post = post_with_published_location
+    before = page_cache_counts()
+    for url in (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{post.id}/",
+    ):
+        response, n_queries = get_twice(unlogged_client, url)
+        assert response["X-Page-Cache"] == "hit", (
+            f"Убедитесь, что страница {url} кешируется для гостей."
+        )
+        assert n_queries == 0, (
+            f"Убедитесь, что закешированная страница {url} не обращается"
+            " к базе данных."
+        )
+    after = page_cache_counts()
+    assert {
+        result: after[result] - before[result] for result in after
+    } == {"hit": 4, "miss": 4}, (
+        "Убедитесь, что попадания и промахи кеша страниц учитываются"
+        " в метриках."
+    )
+
+
+def test_unused_params_share_cache_entry(unlogged_client):
+    unlogged_client.get("/")
+    assert unlogged_client.get("/?x=1")["X-Page-Cache"] == "hit", (
+        "Убедитесь, что параметры, которые страница не читает,"
+        " не входят в ключ кеша."
+    )
+    assert unlogged_client.get("/?page=1")["X-Page-Cache"] == "miss"
+
+
+def test_logged_in_pages_are_not_cached(user_client):
+    user_client.get("/")
+    assert "X-Page-Cache" not in user_client.get("/")
+
+
+def test_comment_invalidates_post_pages(
+        unlogged_client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    for url in ("/", f"/posts/{post.id}/"):
+        unlogged_client.get(url)
+    comment = mixer.blend("blog.Comment", post=post)
+    detail = unlogged_client.get(f"/posts/{post.id}/")
+    assert detail["X-Page-Cache"] == "miss"
+    assert comment.text.splitlines()[0] in detail.content.decode(), (
+        "Убедитесь, что новый комментарий сразу виден на странице поста."
+    )
+    assert "Комментарии (1)" in unlogged_client.get("/").content.decode(), (
+        "Убедитесь, что новый комментарий обновляет счётчик в ленте."
+    )
+
+
+def test_comment_edit_invalidates_post_page(
+        unlogged_client, user_client, user, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    url = f"/posts/{post.id}/"
+    unlogged_client.get(url)
+    user_client.post(
+        f"/posts/{post.id}/edit_comment/{comment.id}/",
+        data={"text": "Исправленный комментарий"},
+    )
+    response = unlogged_client.get(url)
+    assert response["X-Page-Cache"] == "miss"
+    assert "Исправленный комментарий" in response.content.decode(), (
+        "Убедитесь, что изменённый комментарий сразу виден гостям."
+    )
+
+
+def test_changes_invalidate_only_affected_pages(
+        unlogged_client, mixer, user, published_category, another_category,
+        post_with_published_location
+):
+    mixer.blend(
+        "blog.Post", author=user, category=another_category, location=None
+    )
+    category_url = f"/category/{published_category.slug}/"
+    another_url = f"/category/{another_category.slug}/"
+    post_url = f"/posts/{post_with_published_location.id}/"
+    for url in (category_url, another_url, post_url):
+        unlogged_client.get(url)
+
+    location = post_with_published_location.location
+    location.name = "Новое место"
+    location.save()
+
+    assert unlogged_client.get(post_url)["X-Page-Cache"] == "miss", (
+        "Убедитесь, что изменение места сбрасывает кеш страниц его постов."
+    )
+    assert unlogged_client.get(category_url)["X-Page-Cache"] == "miss"
+    assert unlogged_client.get(another_url)["X-Page-Cache"] == "hit", (
+        "Убедитесь, что изменение места не сбрасывает кеш страниц,"
+        " где его постов нет."
+    )
+
+
+def rendered_templates(client, url):
+    return [template.name for template in client.get(url).templates]
+
+
+def test_post_cards_are_cached_by_version(
+        user_client, unlogged_client, post_with_published_location
+):
+    assert "includes/category_link.html" in rendered_templates(
+        user_client, "/"
+    )
+    assert "includes/category_link.html" not in rendered_templates(
+        user_client, "/"
+    ), "Убедитесь, что карточка поста берётся из кеша фрагментов."
+    assert "includes/category_link.html" not in rendered_templates(
+        unlogged_client, "/"
+    ), "Убедитесь, что гости и пользователи делят кеш карточек."
+
+    category = post_with_published_location.category
+    category.title = "Новое название"
+    category.save()
+    response = user_client.get("/")
+    assert "includes/category_link.html" in [
+        template.name for template in response.templates
+    ], "Убедитесь, что изменение категории сбрасывает кеш карточки."
+    assert "Новое название" in response.content.decode()
+
+
+def test_warmed_pages_served_from_cache(
+        unlogged_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    requests = metrics.REQUESTS.labels("blog:post_detail", "GET", 200)
+    before = requests._value.get()
+    tasks.warm_page_cache(paths=[url, "/posts/0/"])
+    assert requests._value.get() == before, (
+        "Убедитесь, что прогрев кеша не считается запросом к сайту."
+    )
+    assert unlogged_client.get(url)["X-Page-Cache"] == "hit", (
+        "Убедитесь, что фоновая задача кладёт страницу в кеш страниц."
+    )
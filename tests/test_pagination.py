@@ -0,0 +1,123 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+from blog.paginators import CachedCountPaginator
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _walk_cursor_pages(client: Client, url: str, response):
+    pages = [list(response.context["page_obj"])]
+    while response.context["page_obj"].has_next():
+        next_cursor = response.context["page_obj"].next_cursor
+        response = client.get(url, {"cursor": next_cursor})
+        assert response.status_code == HTTPStatus.OK, (
+            "Убедитесь, что страница ленты по курсору загружается без ошибок."
+        )
+        pages.append(list(response.context["page_obj"]))
+    return pages, response
+
+
+@pytest.mark.parametrize("url_template", [
+    "/",
+    "/category/{category.slug}/",
+    "/profile/{user.username}/",
+])
+def test_cursor_pagination_walks_whole_feed(
+        user_client, user, published_category,
+        many_posts_with_published_locations, url_template
+):
+    url = url_template.format(category=published_category, user=user)
+    pages, last_response = _walk_cursor_pages(
+        user_client, url, user_client.get(url)
+    )
+    assert all(len(page) <= N_PER_PAGE for page in pages)
+    posts = [post for page in pages for post in page]
+    expected = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    )
+    assert [post.id for post in posts] == [post.id for post in expected], (
+        "Убедитесь, что переходы по курсору показывают все публикации ленты"
+        " ровно один раз, «от новых к старым»."
+    )
+
+    previous_cursor = last_response.context["page_obj"].previous_cursor
+    response = user_client.get(url, {"cursor": previous_cursor})
+    assert [post.id for post in response.context["page_obj"]] == [
+        post.id for post in pages[-2]
+    ], "Убедитесь, что ссылка на предыдущую страницу ведёт назад по ленте."
+
+
+def test_cursor_last_page(user_client, many_posts_with_published_locations):
+    next_cursor = user_client.get("/").context["page_obj"].next_cursor
+    response = user_client.get("/", {"cursor": next_cursor})
+    last_cursor = response.context["page_obj"].paginator.last_cursor
+    response = user_client.get("/", {"cursor": last_cursor})
+    assert response.status_code == HTTPStatus.OK
+    page = response.context["page_obj"]
+    oldest = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.id),
+    )[:N_PER_PAGE]
+    assert [post.id for post in page] == [post.id for post in oldest[::-1]]
+    assert not page.has_next()
+    assert page.has_previous()
+
+
+def test_invalid_cursor_returns_404(user_client):
+    response = user_client.get("/", {"cursor": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что некорректный курсор приводит к ошибке 404."
+    )
+
+
+def test_feed_count_is_cached_until_posts_change(
+        user_client, mixer, user, published_category,
+        many_posts_with_published_locations
+):
+    user_client.get("/")
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get("/")
+    assert not any("COUNT" in q["sql"] for q in queries.captured_queries), (
+        "Убедитесь, что число постов в ленте берётся из кеша."
+    )
+    count = response.context["page_obj"].paginator.count
+
+    mixer.blend("blog.Post", author=user, category=published_category)
+    response = user_client.get("/")
+    assert response.context["page_obj"].paginator.count == count + 1, (
+        "Убедитесь, что кешированное число постов сбрасывается"
+        " при добавлении поста."
+    )
+
+
+def test_elided_page_range(unlogged_client, mixer, user, published_category):
+    mixer.cycle(N_PER_PAGE * 25).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    response = unlogged_client.get("/", {"page": 12})
+    page = response.context["page_obj"]
+    ellipsis = page.paginator.ELLIPSIS
+    assert page.elided_page_range == [
+        1, 2, ellipsis, 9, 10, 11, 12, 13, 14, 15, ellipsis, 24, 25
+    ], "Убедитесь, что пагинатор показывает только окно номеров страниц."
+    assert response.content.decode().count('class="page-link"') < 20
+
+
+def test_approximate_count(mixer, user, published_category):
+    mixer.cycle(5).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    paginator = CachedCountPaginator(
+        Post.objects.order_by("-pub_date"), 2, count_limit=3
+    )
+    assert paginator.count == 3
+    assert paginator.count_is_approximate
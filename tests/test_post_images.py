@@ -0,0 +1,98 @@
+from io import BytesIO
+
+import pytest
+from bs4 import BeautifulSoup
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from blog.images import VARIANT_WIDTHS
+from jobs.queue import run_pending
+
+pytestmark = [pytest.mark.django_db]
+
+
+def image_file(width, height, name="big_image.jpg"):
+    img_io = BytesIO()
+    Image.new("RGB", (width, height), color=(73, 109, 137)).save(
+        img_io, format="JPEG"
+    )
+    return ImageFile(img_io, name=name)
+
+
+@pytest.fixture
+def post_with_big_image(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, image=image_file(2000, 1000),
+    )
+    assert post.image_variants == {}, (
+        "Убедитесь, что копии фото делаются не во время запроса,"
+        " а фоновой задачей."
+    )
+    run_pending()
+    post.refresh_from_db()
+    return post
+
+
+def variant_names(post):
+    return [
+        variant["name"]
+        for kind in VARIANT_WIDTHS
+        for variant in post.image_variants[kind]
+    ]
+
+
+def test_variants_made_on_upload(post_with_big_image):
+    variants = post_with_big_image.image_variants
+    assert (variants["width"], variants["height"]) == (2000, 1000)
+    card = VARIANT_WIDTHS["card"]
+    assert sorted(
+        (variant["format"], variant["width"], variant["height"])
+        for variant in variants["card"]
+    ) == [
+        ("jpeg", card, card // 2),
+        ("jpeg", card * 2, card),
+        ("webp", card, card // 2),
+        ("webp", card * 2, card),
+    ], "Убедитесь, что для карточки делаются копии 1x и 2x в WebP и JPEG."
+    for variant in variants["card"] + variants["detail"]:
+        with default_storage.open(variant["name"]) as stored:
+            assert Image.open(stored).width == variant["width"]
+
+
+def test_small_image_is_not_upscaled(post_with_published_location):
+    run_pending()
+    post_with_published_location.refresh_from_db()
+    widths = {
+        variant["width"]
+        for variant in post_with_published_location.image_variants["detail"]
+    }
+    assert widths == {100}, "Убедитесь, что копии не больше оригинала."
+
+
+def test_feed_does_not_ship_original(client, post_with_big_image):
+    soup = BeautifulSoup(client.get("/").content.decode(), "html.parser")
+    img = soup.select_one("picture img")
+    original = post_with_big_image.image.url
+    assert original not in img["src"] and original not in img["srcset"], (
+        "Убедитесь, что в ленте показываются копии фото, а не оригинал."
+    )
+    assert img["loading"] == "lazy"
+    assert img["width"] == str(VARIANT_WIDTHS["card"])
+    assert soup.find("source", type="image/webp")["srcset"], (
+        "Убедитесь, что браузерам с поддержкой WebP предлагается WebP."
+    )
+
+
+def test_replaced_image_variants_are_deleted(post_with_big_image):
+    old_names = variant_names(post_with_big_image)
+    post_with_big_image.image = image_file(800, 600, "other_image.jpg")
+    post_with_big_image.save()
+    run_pending()
+    post_with_big_image.refresh_from_db()
+    assert not any(default_storage.exists(name) for name in old_names), (
+        "Убедитесь, что копии прежнего фото удаляются при его замене."
+    )
+    assert post_with_big_image.image_variants["width"] == 800
+    post_with_big_image.delete()
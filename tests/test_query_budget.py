@@ -0,0 +1,49 @@
+import pytest
+from django.template.loader import render_to_string
+
+from blog.models import Post
+from blog.profiling import profile
+from blog.scheduling import publish_if_due
+from plugins import query_budget
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_queries_report_template_line(post_with_published_location):
+    post = Post.objects.get(pk=post_with_published_location.pk)
+    with profile(keep_queries=True) as result:
+        render_to_string("includes/post_card.html", {"post": post})
+    templates = {query.template for query in result.queries}
+    assert any(
+        template and template.startswith("includes/post_card.html:")
+        for template in templates
+    ), "Убедитесь, что для запроса из шаблона указывается строка шаблона."
+
+
+def test_budget_failure_lists_queries(
+        monkeypatch, client, post_with_published_location
+):
+    monkeypatch.setitem(
+        query_budget.QUERY_BUDGETS, ("blog:post_detail", "GET"), 0
+    )
+    with pytest.raises(pytest.fail.Exception) as error:
+        client.get(f"/posts/{post_with_published_location.id}/")
+    message = str(error.value)
+    assert "blog:post_detail" in message and "blog/views.py:" in message, (
+        "Убедитесь, что при превышении бюджета выводятся запросы"
+        " и места в коде, откуда они пришли."
+    )
+
+
+def test_schedule_check_from_cache_not_subtracted(
+        monkeypatch, client, post_with_published_location
+):
+    publish_if_due()
+    monkeypatch.setitem(query_budget.QUERY_BUDGETS, ("blog:index", "GET"), 1)
+    with pytest.raises(pytest.fail.Exception) as error:
+        client.get("/")
+    assert "blog/scheduling.py" not in str(error.value), (
+        "Убедитесь, что из числа запросов вычитаются только запросы"
+        " проверки отложенных публикаций, действительно выполненные"
+        " в этом запросе."
+    )
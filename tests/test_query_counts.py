@@ -0,0 +1,96 @@
+import pytest
+from django.core import serializers
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+from blog.scheduling import publish_due_posts
+from plugins.query_budget import AUTH_QUERIES, QUERY_BUDGETS, view_name
+
+pytestmark = [pytest.mark.django_db]
+
+# Страницы, которые гость и автор открывают на наполненном блоге;
+# бюджеты берутся из общей таблицы плагина query_budget.
+GUEST_URLS = (
+    "/",
+    "/?page=2",
+    "/category/{category}/",
+    "/profile/{username}/",
+    "/posts/{post}/",
+)
+AUTHOR_URLS = GUEST_URLS + (
+    "/posts/{post}/edit/",
+    "/posts/{post}/delete/",
+    "/posts/{post}/edit_comment/{comment}/",
+    "/posts/{post}/delete_comment/{comment}/",
+    "/edit_profile/",
+    "/posts/create/",
+)
+
+
+@pytest.fixture
+def busy_blog(
+        mixer, user, published_category, many_posts_with_published_locations,
+        post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(15).blend("blog.Comment", post=post, author=user)
+    publish_due_posts()
+    return {
+        "category": published_category.slug,
+        "username": user.username,
+        "post": post.id,
+        "comment": comments[0].id,
+    }
+
+
+def assert_within_budget(client, url, extra=0):
+    budget = QUERY_BUDGETS[(view_name(url), "GET")] + extra
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    sql = "\n".join(query["sql"] for query in queries.captured_queries)
+    assert len(queries) <= budget, (
+        f"Убедитесь, что страница {url} выполняет не больше {budget}"
+        f" запросов к базе данных. Выполнено {len(queries)}:\n{sql}"
+    )
+
+
+@pytest.mark.parametrize("url", GUEST_URLS)
+def test_unlogged_query_budget(unlogged_client, busy_blog, url):
+    assert_within_budget(unlogged_client, url.format(**busy_blog))
+
+
+@pytest.mark.parametrize("url", AUTHOR_URLS)
+def test_author_query_budget(user_client, busy_blog, url):
+    assert_within_budget(user_client, url.format(**busy_blog), AUTH_QUERIES)
+
+
+def test_feed_does_not_load_post_text(unlogged_client, busy_blog):
+    with CaptureQueriesContext(connection) as queries:
+        response = unlogged_client.get("/")
+    assert not any(
+        '"blog_post"."text"' in query["sql"]
+        for query in queries.captured_queries
+    ), "Убедитесь, что лента не загружает полный текст постов."
+    post = response.context["page_obj"][0]
+    assert post.excerpt in response.content.decode(), (
+        "Убедитесь, что в карточке поста выводится сохранённый анонс."
+    )
+
+
+def test_excerpt_filled_on_loaddata(
+        user, published_category, published_location
+):
+    fixture = serializers.serialize("json", [Post(
+        pk=1000, title="Из фикстуры", text="Текст поста из фикстуры",
+        pub_date=timezone.now(), created_at=timezone.now(), author=user,
+        category=published_category, location=published_location,
+    )])
+    for obj in serializers.deserialize("json", fixture):
+        obj.save()
+    assert Post.objects.get(pk=1000).excerpt == "Текст поста из фикстуры", (
+        "Убедитесь, что анонс заполняется и у постов, загруженных"
+        " командой loaddata."
+    )
@@ -0,0 +1,97 @@
+from typing import List
+
+import pytest
+from django.db import connection
+from django.db.models import QuerySet
+
+from blog.models import Comment, Post
+from blog.paginators import CursorPaginator
+from blog.views import CategoryView, filter_published_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+def explain(queryset: QuerySet) -> List[str]:
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def after_first_page(queryset: QuerySet) -> QuerySet:
+    paginator = CursorPaginator(queryset, 10)
+    ordering = paginator.ordering
+    first = queryset.order_by(*ordering).first()
+    position = [getattr(first, name) for name in paginator.fields]
+    return queryset.order_by(*ordering).filter(
+        paginator._after(ordering, position)
+    )
+
+
+@pytest.fixture
+def feed_querysets(
+        user, published_category, many_posts_with_published_locations
+):
+    return {
+        "главной страницы": filter_published_posts(Post.objects),
+        "страницы категории": filter_published_posts(
+            published_category.posts
+        ),
+        "страницы автора": filter_published_posts(user.posts),
+        "страницы автора для самого автора": filter_published_posts(
+            user.posts, False
+        ),
+    }
+
+
+@pytest.mark.parametrize("paginate", [
+    lambda queryset: queryset[:11],
+    lambda queryset: after_first_page(queryset)[:11],
+], ids=["first page", "cursor page"])
+def test_feed_queries_use_index(feed_querysets, paginate):
+    for name, queryset in feed_querysets.items():
+        plan = explain(paginate(queryset))
+        post_steps = [step for step in plan if "blog_post" in step]
+        assert post_steps and all(
+            "USING INDEX" in step for step in post_steps
+        ), (
+            f"Убедитесь, что запрос ленты {name} читает публикации по индексу."
+            f" План запроса: {plan}"
+        )
+        assert not any("TEMP B-TREE" in step for step in plan), (
+            f"Убедитесь, что запрос ленты {name} не сортирует публикации"
+            f" во временном B-дереве. План запроса: {plan}"
+        )
+
+
+def test_post_comments_query_uses_index(post_with_published_location):
+    plan = explain(
+        Comment.objects.filter(
+            post=post_with_published_location
+        ).select_related("author")
+    )
+    assert any("comment_post_created_idx" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_category_feed_table_is_single_index_scan(
+        published_category, many_posts_with_published_locations
+):
+    view = CategoryView(kwargs={"category_slug": published_category.slug})
+    queryset = view.get_queryset()
+    paginator = CursorPaginator(queryset, 10, view.cursor_ordering)
+    first = paginator.page().object_list[0]
+    for page_queryset in (
+        queryset[:11],
+        queryset.order_by(*paginator.ordering).filter(paginator._after(
+            paginator.ordering,
+            [getattr(first, name) for name in paginator.fields]
+        ))[:11],
+    ):
+        plan = explain(page_queryset)
+        assert "category_feed_idx" in plan[0], (
+            "Убедитесь, что страница категории читает материализованную"
+            f" ленту по индексу. План запроса: {plan}"
+        )
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+    assert len(queryset) == len(many_posts_with_published_locations)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Post
+from blog.scheduling import (
+    next_publication, posts_published, publish_due_posts, publish_if_due
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_future_post_published_when_due(
+        user_client, mixer, user, published_category
+):
+    pub_date = timezone.now() + timedelta(hours=1)
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=pub_date
+    )
+    assert not post.is_visible
+    assert next_publication() == pub_date
+    assert publish_if_due() == [], (
+        "Убедитесь, что отложенный пост не публикуется раньше времени."
+    )
+
+    received = []
+
+    def on_published(sender, posts, **kwargs):
+        received.extend(posts)
+
+    posts_published.connect(on_published)
+    try:
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(seconds=1)
+        )
+        published = publish_due_posts()
+    finally:
+        posts_published.disconnect(on_published)
+
+    assert [item["id"] for item in published] == [post.id]
+    assert [item["id"] for item in received] == [post.id], (
+        "Убедитесь, что о появлении поста в ленте сообщает сигнал"
+        " `posts_published`."
+    )
+    post.refresh_from_db()
+    assert post.is_visible
+    response = user_client.get("/")
+    assert post in response.context["page_obj"], (
+        "Убедитесь, что отложенный пост появляется на главной странице,"
+        " когда наступает время публикации."
+    )
+
+
+def test_category_publication_changes_visibility(
+        mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1)
+    )
+    assert post.is_visible
+
+    published_category.is_published = False
+    published_category.save()
+    post.refresh_from_db()
+    assert not post.is_visible, (
+        "Убедитесь, что посты снятой с публикации категории скрываются."
+    )
+
+    published_category.is_published = True
+    published_category.save()
+    post.refresh_from_db()
+    assert post.is_visible
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.views import PAGINATE_BY
+from jobs.queue import run_pending
+
+pytestmark = [pytest.mark.django_db]
+
+
+def search(client, query, **params):
+    return client.get("/search/", {"q": query, **params})
+
+
+def found_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(**kwargs):
+        kwargs.setdefault("category", published_category)
+        kwargs.setdefault("location", None)
+        kwargs.setdefault("pub_date", timezone.now() - timedelta(days=1))
+        return mixer.blend("blog.Post", author=user, **kwargs)
+    return make
+
+
+def test_search_uses_stems(client, make_post):
+    post = make_post(
+        title="Заметки", text="Мы долго гуляли по весенним набережным."
+    )
+    make_post(title="Другое", text="Совсем о другом.")
+    response = search(client, "набережная")
+    assert found_ids(response) == [post.id], (
+        "Убедитесь, что поиск находит другие формы слова."
+    )
+    snippet = response.context["page_obj"][0].snippet
+    assert "<mark>набережным</mark>" in snippet, (
+        "Убедитесь, что в отрывке выделено найденное слово."
+    )
+
+
+def test_search_ranks_title_higher(client, make_post):
+    in_text = make_post(title="Путевые заметки", text="Горы были красивы.")
+    in_title = make_post(title="Горы", text="Заметки о путешествии.")
+    assert found_ids(search(client, "горы")) == [in_title.id, in_text.id]
+
+
+def test_search_respects_visibility(client, make_post, mixer):
+    make_post(text="секретный черновик", is_published=False)
+    make_post(
+        text="секретный анонс", pub_date=timezone.now() + timedelta(days=1)
+    )
+    make_post(
+        text="секретная категория",
+        category=mixer.blend("blog.Category", is_published=False),
+    )
+    assert found_ids(search(client, "секретный")) == [], (
+        "Убедитесь, что поиск не показывает скрытые посты."
+    )
+
+
+def test_search_follows_edits(client, make_post, mixer):
+    post = make_post(text="Рецепт пирога")
+    post.text = "Рецепт супа"
+    post.save()
+    assert found_ids(search(client, "пирог")) == []
+    location = mixer.blend("blog.Location", name="Казань", is_published=True)
+    post.location = location
+    post.save()
+    assert found_ids(search(client, "казань")) == [post.id]
+    location.name = "Самара"
+    location.save()
+    run_pending()
+    assert found_ids(search(client, "самара")) == [post.id], (
+        "Убедитесь, что индекс обновляется при изменении места."
+    )
+    post.delete()
+    assert found_ids(search(client, "суп")) == []
+
+
+def test_search_pagination(client, make_post):
+    posts = [
+        make_post(text=f"Путешествие номер {i}")
+        for i in range(PAGINATE_BY + 3)
+    ]
+    response = search(client, "путешествие")
+    page = response.context["page_obj"]
+    seen = found_ids(response)
+    assert len(seen) == PAGINATE_BY and page.has_next()
+    response = search(client, "путешествие", page=page.next_page_number())
+    seen += found_ids(response)
+    assert sorted(seen) == sorted(post.id for post in posts)
+    assert not response.context["page_obj"].has_next()
+    assert search(client, "путешествие", page="x").status_code == 404
@@ -0,0 +1,50 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def seed(processes):
+    call_command(
+        "seed", seed=7, users=5, categories=3, locations=4, posts=60,
+        comments=3, processes=processes, stdout=StringIO(),
+    )
+    return [
+        (post.title, post.pub_date, post.is_visible, post.comment_count)
+        for post in Post.objects.order_by("id")
+    ]
+
+
+def test_seed_creates_consistent_data():
+    posts = seed(processes=0)
+    assert len(posts) == 60
+    assert Comment.objects.count() == sum(post[3] for post in posts), (
+        "Убедитесь, что число комментариев у постов совпадает"
+        " с созданными комментариями."
+    )
+    for post in Post.objects.all():
+        assert post.is_visible == post.compute_visibility()
+        assert post.excerpt == post.make_excerpt()
+    comment = Comment.objects.select_related("post").first()
+    assert comment.post.pub_date <= comment.created_at <= timezone.now(), (
+        "Убедитесь, что комментарии появляются после публикации поста."
+    )
+    new_post = Post.objects.create(
+        title="Новый", text="Текст", author=comment.author,
+        category=comment.post.category, pub_date=timezone.now(),
+    )
+    assert new_post.id == 61
+
+
+def test_seed_is_deterministic():
+    first = seed(processes=0)
+    Post.objects.all().delete()
+    assert seed(processes=2) == first, (
+        "Убедитесь, что при одном зерне данные не зависят"
+        " от числа процессов."
+    )
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from django.test import Client, override_settings
+
+from blog import middleware, profiling
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def log_lines(monkeypatch):
+    lines = []
+    monkeypatch.setattr(middleware.logger, "info", lines.append)
+    return lines
+
+
+@override_settings(BLOG_SERVER_TIMING_SAMPLE_RATE=1.0)
+def test_server_timing_header(post_with_published_location, log_lines):
+    response = Client().get(f"/posts/{post_with_published_location.id}/")
+    header = response["Server-Timing"]
+    for metric in ("sql;dur=", "tpl;dur=", "cache;desc=", "total;dur="):
+        assert metric in header, (
+            f"Убедитесь, что заголовок Server-Timing содержит {metric}"
+        )
+    record = json.loads(log_lines[-1])
+    assert record["view"] == "blog:post_detail"
+    assert record["queries"] > 0 and record["template_ms"] > 0
+    assert record["cache_misses"] > 0
+
+    Client().get(f"/posts/{post_with_published_location.id}/")
+    assert json.loads(log_lines[-1])["cache_hits"] > 0, (
+        "Убедитесь, что попадания в кеш страниц учитываются."
+    )
+
+
+@pytest.mark.parametrize("settings_override", [
+    {"BLOG_SERVER_TIMING": False},
+    {"BLOG_SERVER_TIMING_SAMPLE_RATE": 0},
+])
+def test_server_timing_can_be_disabled(settings_override, log_lines):
+    with override_settings(**settings_override):
+        response = Client().get("/")
+    assert "Server-Timing" not in response
+    assert log_lines == []
+
+
+@override_settings(BLOG_SERVER_TIMING_SAMPLE_RATE=1.0)
+def test_one_profile_per_request(monkeypatch, log_lines):
+    calls = []
+    profile = profiling.profile
+
+    def counting_profile(*args, **kwargs):
+        calls.append(args)
+        return profile(*args, **kwargs)
+
+    monkeypatch.setattr(profiling, "profile", counting_profile)
+    Client().get("/")
+    assert len(calls) == 1, (
+        "Убедитесь, что метрики и Server-Timing замеряют запрос одним"
+        " профилем."
+    )
+    assert json.loads(log_lines[-1])["total_ms"] > 0
+
+
+def test_get_many_counted_once():
+    cache.set("server-timing-hit", 1)
+    with profiling.profile() as result:
+        cache.get_many(["server-timing-hit", "server-timing-miss"])
+    assert (result.cache_hits, result.cache_misses) == (1, 1), (
+        "Убедитесь, что каждый ключ get_many() учитывается один раз."
+    )
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+from django.template import Context, Engine
+from django.test import Client, override_settings
+
+from blog import slow_queries
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def log_lines(monkeypatch):
+    lines = []
+    monkeypatch.setattr(slow_queries.logger, "warning", lines.append)
+    monkeypatch.setattr(slow_queries, "_explained", set())
+    return lines
+
+
+def test_normalize_groups_queries_by_shape():
+    assert slow_queries.fingerprint(
+        "SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'a' LIMIT 21"
+    ) == slow_queries.fingerprint(
+        "SELECT *  FROM t WHERE id IN (%s) AND name = 'b''c' LIMIT 11"
+    ), "Убедитесь, что запросы, различающиеся значениями, — одной формы."
+    assert slow_queries.fingerprint(
+        "SELECT * FROM t WHERE id = %s"
+    ) != slow_queries.fingerprint("SELECT * FROM u WHERE id = %s")
+
+
+@override_settings(BLOG_SLOW_QUERY_MS=0)
+def test_slow_queries_logged_with_view_and_plan(
+        user_client, post_with_published_location, log_lines
+):
+    url = "/"
+    user_client.get(url)
+    user_client.get(url)
+    records = [json.loads(line) for line in log_lines]
+    assert records, "Убедитесь, что медленные запросы попадают в лог."
+    assert all(record["path"] == url for record in records)
+    assert any(record["view"] == "blog:index" for record in records), (
+        "Убедитесь, что в лог пишется view, выполнивший запрос."
+    )
+    assert all(
+        record["source"] and "slow_queries" not in record["source"]
+        for record in records
+    ), "Убедитесь, что в лог пишется строка кода, выполнившая запрос."
+    seen = set()
+    for record in records:
+        first = record["fingerprint"] not in seen
+        seen.add(record["fingerprint"])
+        if record["sql"].startswith("SELECT"):
+            assert bool(record["plan"]) == first, (
+                "Убедитесь, что план записывается один раз для каждой формы"
+                " запроса."
+            )
+
+
+@override_settings(BLOG_SLOW_QUERY_MS=0)
+def test_slow_query_from_template(post_with_published_location, log_lines):
+    engine = Engine(loaders=[(
+        "django.template.loaders.locmem.Loader",
+        {"feed.html": "\n{% for post in posts %}{{ post.id }}{% endfor %}"},
+    )])
+    engine.get_template("feed.html").render(
+        Context({"posts": Post.objects.all()})
+    )
+    assert json.loads(log_lines[-1])["template"] == "feed.html:2", (
+        "Убедитесь, что для запросов из шаблонов в лог пишется строка шаблона."
+    )
+
+
+def test_fast_queries_not_logged(
+        user_client, post_with_published_location, log_lines
+):
+    with override_settings(BLOG_SLOW_QUERY_MS=10 ** 6):
+        user_client.get(f"/posts/{post_with_published_location.id}/")
+    with override_settings(BLOG_SLOW_QUERY_MS=None):
+        Client().get(f"/posts/{post_with_published_location.id}/")
+    assert not log_lines
+
+
+def test_admin_page_shows_worst_offenders(
+        admin_client, user_client, tmp_path, settings
+):
+    log = tmp_path / "slow.log"
+    settings.BLOG_SLOW_QUERY_LOG = log
+    records = [
+        ("aaa", "SELECT * FROM fast WHERE id = 1", 150),
+        ("bbb", "SELECT * FROM slow WHERE id = 1", 300),
+        ("bbb", "SELECT * FROM slow WHERE id = 2", 200),
+    ]
+    log.write_text("".join(
+        json.dumps({
+            "time": "2024-01-01T00:00:00", "fingerprint": fingerprint,
+            "duration_ms": duration, "sql": sql, "view": "blog:index",
+            "template": None, "plan": ["SCAN slow"],
+        }) + "\n"
+        for fingerprint, sql, duration in records
+    ), encoding="utf-8")
+    (tmp_path / "slow.log.1").write_text(json.dumps({
+        "time": "2023-12-31T00:00:00", "fingerprint": "aaa",
+        "duration_ms": 100, "sql": "SELECT * FROM fast WHERE id = 3",
+        "view": None, "template": None, "plan": None,
+    }) + "\nнеполная строка", encoding="utf-8")
+
+    offenders = slow_queries.worst_offenders(slow_queries.read_log())
+    assert [
+        (offender.fingerprint, offender.count, offender.total_ms)
+        for offender in offenders
+    ] == [("bbb", 2, 500), ("aaa", 2, 250)], (
+        "Убедитесь, что формы запросов упорядочены по общему времени"
+        " с учётом архивных файлов лога."
+    )
+
+    response = admin_client.get("/admin/slow-queries/")
+    content = response.content.decode()
+    assert response.status_code == 200
+    assert content.index("FROM slow") < content.index("FROM fast")
+    assert "SCAN slow" in content
+    assert user_client.get("/admin/slow-queries/").status_code == 302, (
+        "Убедитесь, что страница доступна только сотрудникам."
+    )
@@ -0,0 +1,86 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import Context, Engine
+from django.template.loader import render_to_string
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from blog import middleware
+from blog.profiling import profile_templates
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+def test_breakdown_by_template_include_and_tag(post):
+    with profile_templates() as result:
+        render_to_string("includes/post_card.html", {"post": post})
+    labels = {label: calls for label, calls, _ in result.breakdown()}
+    for label in (
+            "includes/post_card.html",
+            '{% include "includes/category_link.html" %}',
+            "{% url %}",
+            "{{ …|date }}",
+    ):
+        assert label in labels, (
+            f"Убедитесь, что профиль шаблонов учитывает {label}."
+        )
+    times = [duration for _, _, duration in result.breakdown()]
+    assert times == sorted(times, reverse=True)
+
+
+def test_nested_nodes_not_counted_twice():
+    engine = Engine(loaders=[(
+        "django.template.loaders.locmem.Loader",
+        {"loops.html": "{% for a in items %}{% for b in items %}"
+                       "{{ b|add:a }}{% endfor %}{% endfor %}"},
+    )])
+    with profile_templates() as result:
+        engine.get_template("loops.html").render(
+            Context({"items": [1, 2, 3]})
+        )
+    assert result.calls["{% for %}"] == 4
+    assert result.calls["{{ …|add }}"] == 9
+    assert result.times["{% for %}"] <= result.times["loops.html"], (
+        "Убедитесь, что время вложенных узлов с той же меткой"
+        " не складывается со временем внешнего."
+    )
+
+
+def test_middleware_logs_breakdown(post, monkeypatch):
+    lines = []
+    monkeypatch.setattr(middleware.logger, "info", lines.append)
+    with override_settings(BLOG_TEMPLATE_PROFILER=True):
+        Client().get("/")
+    records = [json.loads(line) for line in lines]
+    record = next(record for record in records if "templates" in record)
+    assert record["view"] == "blog:index"
+    assert "blog/index.html" in {item["label"] for item in record["templates"]}
+
+    lines.clear()
+    Client().get("/search/")
+    assert not any("templates" in json.loads(line) for line in lines), (
+        "Убедитесь, что профиль шаблонов по умолчанию выключен."
+    )
+
+
+def test_profile_templates_command(post):
+    out = StringIO()
+    call_command("profile_templates", "blog:index", requests=2, stdout=out)
+    output = out.getvalue()
+    assert "код 200" in output
+    assert '{% include "includes/post_card.html" %}' in output
+    with pytest.raises(CommandError):
+        call_command("profile_templates", "blog:missing", stdout=out)